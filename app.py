@@ -6,39 +6,66 @@ Extract core processing logic with minimal changes.
 Focus on simplicity and speed of implementation.
 """
 
+import io
+import logging
 import os
 import tempfile
 import shutil
+import threading
 from pathlib import Path
 from flask import Flask, request, jsonify, send_file
 from werkzeug.utils import secure_filename
-import pandas as pd
+from werkzeug.exceptions import RequestEntityTooLarge
 import flask
 
-# Import existing processors (with minimal modifications)
-import sys
-sys.path.append('..')
-from pdf_processor import PDFProcessor
-from data_processor import DataProcessor  
-from csv_exporter import CSVExporter
+try:
+    from flask_compress import Compress
+except ImportError:  # compression is optional
+    Compress = None
+
+from file_staging import stream_multipart_upload, link_or_copy, scratch_root
+from result_cache import ResultCache, cache_key
+from config import BOL_MAX_CONCURRENT, LOG_FORMAT, LOG_LEVEL
+
+logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max
 
+# Compress CSV/JSON responses when Flask-Compress is installed
+app.config['COMPRESS_MIMETYPES'] = ['text/csv', 'application/json']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_ALGORITHM_STREAMING'] = ['br', 'deflate']  # send_file bodies are streamed
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
+if Compress is not None:
+    Compress(app)
+
+result_cache = ResultCache()
+
+# Admission control: PDF jobs are CPU and memory heavy, so reject instead of queueing
+_SLOTS = threading.BoundedSemaphore(BOL_MAX_CONCURRENT)
+
 class SimpleBOLProcessor:
     """Simplified BOL processor for API-only use."""
     
     @staticmethod
     def process_pdf_to_csv(pdf_file_path, csv_file_path=None):
         """Process PDF and optional CSV, return final CSV path."""
+        # Existing processors pull in pdfplumber/pdf2image/pandas; importing
+        # them on first use keeps app start-up and /health fast
+        from pdf_processor import PDFProcessor
+        from data_processor import DataProcessor
+        from csv_exporter import CSVExporter, merge_csv_files
         
-        # Create temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
+        # Create temporary directory for processing (tmpfs when it has room)
+        with tempfile.TemporaryDirectory(dir=scratch_root(os.path.getsize(pdf_file_path))) as temp_dir:
             try:
-                # Copy PDF to temp directory
+                # Stage PDF in temp directory (hardlink when possible)
                 pdf_name = os.path.basename(pdf_file_path)
                 temp_pdf_path = os.path.join(temp_dir, pdf_name)
-                shutil.copy2(pdf_file_path, temp_pdf_path)
+                link_or_copy(pdf_file_path, temp_pdf_path)
                 
                 # Step 1: Process PDF
                 pdf_processor = PDFProcessor(temp_dir)
@@ -60,13 +87,8 @@ class SimpleBOLProcessor:
                 final_csv_path = os.path.join(temp_dir, "combined_data.csv")
                 
                 if csv_file_path and os.path.exists(csv_file_path):
-                    # Simple CSV merge logic (simplified from original)
-                    pdf_df = pd.read_csv(final_csv_path, dtype=str)
-                    csv_df = pd.read_csv(csv_file_path, dtype=str)
-                    
                     # Basic merge - in production, would implement full logic
-                    merged_df = pd.concat([pdf_df, csv_df], ignore_index=True)
-                    merged_df.to_csv(final_csv_path, index=False)
+                    merge_csv_files(final_csv_path, csv_file_path)
                 
                 # Return the final CSV content
                 with open(final_csv_path, 'rb') as f:
@@ -107,44 +129,54 @@ def health():
 def process_bol():
     """Main processing endpoint - accepts PDF and optional CSV."""
     
+    if not _SLOTS.acquire(blocking=False):
+        return jsonify({'error': 'Server busy, please retry shortly'}), 503, {'Retry-After': '1'}
+    
+    upload_dir = None
     try:
-        # Enhanced debugging
-        print(f"Request method: {request.method}")
-        print(f"Content-Type: {request.content_type}")
-        print(f"Content-Length: {request.headers.get('Content-Length', 'Not set')}")
-        print(f"Files in request: {list(request.files.keys())}")
-        print(f"Form data: {list(request.form.keys())}")
-        print(f"Raw request headers: {dict(request.headers)}")
+        # Inside the try, so a full or unwritable scratch dir can't leak the slot
+        upload_dir = tempfile.mkdtemp(prefix="bol_upload_", dir=scratch_root(request.content_length))
+        
+        # Enhanced debugging (only built when DEBUG logging is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Request method: {request.method}")
+            logger.debug(f"Content-Type: {request.content_type}")
+            logger.debug(f"Content-Length: {request.headers.get('Content-Length', 'Not set')}")
+            logger.debug(f"Raw request headers: {dict(request.headers)}")
         
-        # Check if request has any data at all
-        if hasattr(request, 'data') and request.data:
-            print(f"Raw data length: {len(request.data)}")
-            print(f"Raw data preview: {request.data[:200]}")
+        # Stream the multipart body straight into the upload directory
+        try:
+            upload = stream_multipart_upload(
+                request.stream, request.content_type, upload_dir, ('pdf', 'csv')
+            )
+        except ValueError as e:
+            return jsonify({
+                'error': f'Invalid multipart form data: {str(e)}',
+                'debug': {
+                    'content_type': request.content_type,
+                    'content_length': request.headers.get('Content-Length', 'Not set')
+                }
+            }), 400
         
-        # Check if Flask is parsing multipart correctly
-        if request.content_type and request.content_type.startswith('multipart/form-data'):
-            print("✓ Multipart request detected")
-            if not request.files and not request.form:
-                print("✗ WARNING: Multipart request but no files or form data parsed!")
-                print("This might indicate a parsing issue with the multipart data.")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Files in request: {list(upload.files.keys())}")
+            logger.debug(f"Form data: {list(upload.form.keys())}")
         
         # Validate request
-        if 'pdf' not in request.files:
+        if 'pdf' not in upload.files:
             return jsonify({
                 'error': 'PDF file required',
                 'debug': {
                     'content_type': request.content_type,
                     'content_length': request.headers.get('Content-Length', 'Not set'),
-                    'files_received': list(request.files.keys()),
-                    'form_data': list(request.form.keys()),
-                    'expected_key': 'pdf',
-                    'has_raw_data': bool(hasattr(request, 'data') and request.data),
-                    'raw_data_length': len(request.data) if hasattr(request, 'data') and request.data else 0
+                    'files_received': list(upload.files.keys()),
+                    'form_data': list(upload.form.keys()),
+                    'expected_key': 'pdf'
                 }
             }), 400
         
-        pdf_file = request.files['pdf']
-        csv_file = request.files.get('csv')
+        pdf_file = upload.files['pdf']
+        csv_file = upload.files.get('csv')
         
         if pdf_file.filename == '':
             return jsonify({'error': 'No PDF file selected'}), 400
@@ -153,50 +185,53 @@ def process_bol():
         if not pdf_file.filename.lower().endswith('.pdf'):
             return jsonify({'error': 'File must be a PDF'}), 400
         
-        print(f"Processing PDF: {pdf_file.filename}")
+        logger.info(f"Processing PDF: {pdf_file.filename}")
         
-        # Save uploaded files to temporary locations
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_pdf:
-            pdf_file.save(tmp_pdf.name)
-            pdf_path = tmp_pdf.name
+        pdf_path = pdf_file.path
+        csv_path = csv_file.path if csv_file and csv_file.filename != '' else None
         
-        csv_path = None
-        if csv_file and csv_file.filename != '':
-            with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp_csv:
-                csv_file.save(tmp_csv.name)
-                csv_path = tmp_csv.name
-        
-        try:
-            # Process files
-            result_csv = SimpleBOLProcessor.process_pdf_to_csv(pdf_path, csv_path)
-            
-            # Clean up temp files
-            os.unlink(pdf_path)
-            if csv_path:
-                os.unlink(csv_path)
-            
-            # Return CSV as download
-            with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp_result:
-                tmp_result.write(result_csv)
-                tmp_result.flush()
-                
+        # Repeat uploads of the same inputs are served from the result cache
+        key = cache_key(pdf_file.digest, csv_file.digest if csv_path else None,
+                        os.path.splitext(csv_file.filename)[1] if csv_path else '')
+        cached_path = result_cache.get(key)
+        if cached_path:
+            try:
+                logger.info(f"Result cache hit: {key}")
                 return send_file(
-                    tmp_result.name,
+                    cached_path,
                     as_attachment=True,
                     download_name='bol_processed.csv',
-                    mimetype='text/csv'
+                    mimetype='text/csv',
+                    max_age=0
                 )
-                
-        except Exception as e:
-            # Clean up temp files on error
-            if os.path.exists(pdf_path):
-                os.unlink(pdf_path)
-            if csv_path and os.path.exists(csv_path):
-                os.unlink(csv_path)
-            raise e
+            except FileNotFoundError:
+                pass  # evicted in the meantime, process normally
+        
+        # Process files
+        result_csv = SimpleBOLProcessor.process_pdf_to_csv(pdf_path, csv_path)
+        try:
+            result_cache.put_bytes(key, result_csv)
+        except OSError as e:
+            logger.warning(f"Could not cache result: {e}")
+        
+        # Return CSV as download straight from memory
+        return send_file(
+            io.BytesIO(result_csv),
+            as_attachment=True,
+            download_name='bol_processed.csv',
+            mimetype='text/csv',
+            max_age=0
+        )
         
+    except RequestEntityTooLarge:
+        raise  # body exceeded MAX_CONTENT_LENGTH while streaming
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        # Clean up uploaded files
+        if upload_dir:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+        _SLOTS.release()
 
 @app.route('/debug/multipart', methods=['POST'])
 def debug_multipart():
@@ -10,6 +10,12 @@ import os
 import tempfile
 import shutil
 import logging
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional, Dict, Any, Tuple
 from dataclasses import dataclass
@@ -17,18 +23,22 @@ from enum import Enum
 from flask import Flask, request, jsonify, send_file
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
-import pandas as pd
+
+try:
+    from flask_compress import Compress
+except ImportError:  # compression is optional
+    Compress = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Import core processors
-import sys
-sys.path.append('..')
-from pdf_processor import PDFProcessor
-from data_processor import DataProcessor
-from csv_exporter import CSVExporter
+# Core processors (pdf_processor, data_processor, csv_exporter) pull in
+# pdfplumber/pdf2image/pandas and are imported on first use, so the app
+# boots and answers /health without loading them
+from file_staging import stream_multipart_upload, link_or_copy, safe_unlink, scratch_root
+from result_cache import ResultCache, cache_key
+from config import BOL_CACHE_TTL, BOL_MAX_CONCURRENT
 
 class ProcessingStatus(Enum):
     """Processing status enumeration."""
@@ -37,30 +47,34 @@ class ProcessingStatus(Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
-@dataclass
+# Accepted upload extensions
+_PDF_EXT = '.pdf'
+_CSV_EXTS = frozenset({'.csv', '.xlsx', '.xls'})
+
+@dataclass(frozen=True, slots=True)
 class ProcessingRequest:
     """Request model for BOL processing."""
-    pdf_content: bytes
+    pdf_path: str
     pdf_filename: str
-    csv_content: Optional[bytes] = None
+    csv_path: Optional[str] = None
     csv_filename: Optional[str] = None
+    cache_key: Optional[str] = None  # content hash of the inputs, see result_cache
     
     def validate(self) -> None:
         """Validate the processing request."""
-        if not self.pdf_content:
+        if not self.pdf_path or os.path.getsize(self.pdf_path) == 0:
             raise ValueError("PDF content is required")
-        if not self.pdf_filename.lower().endswith('.pdf'):
+        if os.path.splitext(self.pdf_filename)[1].lower() != _PDF_EXT:
             raise ValueError("PDF file must have .pdf extension")
-        if self.csv_content and self.csv_filename:
-            valid_csv_extensions = ['.csv', '.xlsx', '.xls']
-            if not any(self.csv_filename.lower().endswith(ext) for ext in valid_csv_extensions):
+        if self.csv_path and self.csv_filename:
+            if os.path.splitext(self.csv_filename)[1].lower() not in _CSV_EXTS:
                 raise ValueError("CSV file must have .csv, .xlsx, or .xls extension")
 
-@dataclass 
+@dataclass(frozen=True, slots=True)
 class ProcessingResult:
     """Result model for BOL processing."""
     status: ProcessingStatus
-    csv_content: Optional[bytes] = None
+    csv_path: Optional[str] = None
     error_message: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
@@ -75,45 +89,83 @@ class ProcessingError(Exception):
 class FileService:
     """Service for file operations."""
     
-    @staticmethod
-    def save_temp_file(content: bytes, suffix: str) -> str:
-        """Save content to temporary file and return path."""
-        try:
-            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-                tmp.write(content)
-                return tmp.name
-        except Exception as e:
-            logger.error(f"Failed to save temporary file: {e}")
-            raise ProcessingError(f"File save error: {str(e)}")
-    
     @staticmethod
     def cleanup_files(*file_paths: str) -> None:
         """Clean up temporary files."""
         for file_path in file_paths:
             try:
-                if file_path and os.path.exists(file_path):
-                    os.unlink(file_path)
+                if safe_unlink(file_path):
                     logger.debug(f"Cleaned up file: {file_path}")
             except Exception as e:
                 logger.warning(f"Failed to cleanup file {file_path}: {e}")
 
+# Warm processor instances kept per service (one per concurrent pipeline is enough)
+PROCESSOR_POOL_SIZE = 8
+
+class _ProcessorPool:
+    """Bounded LIFO pool of reusable processor instances.
+    
+    Instances are created lazily by ``factory`` and the most recently
+    returned one is handed out first, so repeated requests reuse warm
+    objects instead of paying their constructor cost (Poppler probe,
+    session directory setup) every time.
+    """
+    
+    def __init__(self, factory, maxsize: int = PROCESSOR_POOL_SIZE, reset=None):
+        self._factory = factory
+        self._reset = reset
+        self._queue = queue.LifoQueue(maxsize)
+    
+    @contextmanager
+    def acquire(self):
+        """Borrow an instance for the duration of a ``with`` block."""
+        try:
+            instance = self._queue.get_nowait()
+        except queue.Empty:
+            instance = self._factory()
+        try:
+            yield instance
+        finally:
+            if self._reset:
+                self._reset(instance)
+            try:
+                self._queue.put_nowait(instance)
+            except queue.Full:
+                pass  # pool already holds enough warm instances
+
+def _new_pdf_processor():
+    from pdf_processor import PDFProcessor
+    return PDFProcessor(None)
+
+def _new_data_processor():
+    from data_processor import DataProcessor
+    return DataProcessor()
+
+def _new_csv_exporter():
+    from csv_exporter import CSVExporter
+    return CSVExporter(None)
+
+def _reset_processor(processor) -> None:
+    processor.reset(None)
+
 class PDFService:
     """Service for PDF processing operations."""
     
     def __init__(self):
         self.file_service = FileService()
+        self._pool = _ProcessorPool(_new_pdf_processor, reset=_reset_processor)
     
-    def process_pdf(self, pdf_content: bytes, working_dir: str) -> bool:
+    def process_pdf(self, pdf_path: str, working_dir: str) -> bool:
         """Process PDF and extract text."""
         try:
-            # Save PDF to working directory
-            pdf_path = os.path.join(working_dir, "input.pdf")
-            with open(pdf_path, 'wb') as f:
-                f.write(pdf_content)
+            # Stage PDF in working directory (hardlink, no bytes copied)
+            staged_pdf_path = os.path.join(working_dir, "input.pdf")
+            link_or_copy(pdf_path, staged_pdf_path)
             
-            # Process with PDF processor
-            processor = PDFProcessor(working_dir)
-            success = processor.process_first_pdf()
+            # Process with a pooled PDF processor
+            with self._pool.acquire() as processor:
+                processor.session_dir = working_dir
+                success = processor.process_first_pdf()
             
             if not success:
                 raise ProcessingError("PDF text extraction failed")
@@ -128,15 +180,17 @@ class PDFService:
 class DataService:
     """Service for data processing operations."""
     
+    def __init__(self):
+        self._pool = _ProcessorPool(_new_data_processor, reset=_reset_processor)
+    
     def process_extracted_data(self, working_dir: str) -> bool:
         """Process extracted text data."""
         try:
-            # Override session directory for existing processor
-            processor = DataProcessor()
-            processor.session_dir = working_dir
-            processor.invoice_data = {}  # Reset data
-            
-            success = processor.process_all_files()
+            # Point a pooled processor at this request's working directory
+            with self._pool.acquire() as processor:
+                processor.session_dir = working_dir
+                processor.invoice_data = {}  # Reset data
+                success = processor.process_all_files()
             
             if not success:
                 raise ProcessingError("Data processing failed")
@@ -152,13 +206,17 @@ class CSVService:
     """Service for CSV operations."""
     
     def __init__(self):
+        # Excel uploads are read with the calamine engine when python-calamine
+        # is installed (see csv_exporter.read_excel_frame)
         self.file_service = FileService()
+        self._pool = _ProcessorPool(_new_csv_exporter, reset=_reset_processor)
     
     def create_initial_csv(self, working_dir: str) -> str:
         """Create initial CSV from processed data."""
         try:
-            exporter = CSVExporter(working_dir)
-            success = exporter.combine_to_csv()
+            with self._pool.acquire() as exporter:
+                exporter.session_dir = working_dir
+                success = exporter.combine_to_csv()
             
             if not success:
                 raise ProcessingError("CSV creation failed")
@@ -174,38 +232,25 @@ class CSVService:
             logger.error(f"CSV creation failed: {e}")
             raise ProcessingError(f"CSV creation error: {str(e)}")
     
-    def merge_with_additional_csv(self, base_csv_path: str, additional_csv_content: bytes, 
+    def merge_with_additional_csv(self, base_csv_path: str, additional_csv_path: str, 
                                 additional_csv_filename: str) -> str:
         """Merge base CSV with additional CSV data."""
+        import pandas as pd
+        from csv_exporter import concat_frames, merge_csv_files, read_excel_frame
         try:
-            # Save additional CSV to temp file
-            additional_csv_path = self.file_service.save_temp_file(
-                additional_csv_content, 
-                os.path.splitext(additional_csv_filename)[1]
-            )
-            
-            try:
-                # Read both CSVs
+            # TODO: Implement sophisticated merge logic from original process_csv_file
+            # For now, simple concatenation
+            if additional_csv_filename.lower().endswith('.csv'):
+                # CSV + CSV stays in pyarrow (when installed) end to end
+                base_rows, additional_rows = merge_csv_files(base_csv_path, additional_csv_path)
+            else:
                 base_df = pd.read_csv(base_csv_path, dtype=str)
-                
-                # Handle different file types
-                if additional_csv_filename.lower().endswith('.csv'):
-                    additional_df = pd.read_csv(additional_csv_path, dtype=str)
-                else:
-                    additional_df = pd.read_excel(additional_csv_path, dtype=str)
-                
-                # TODO: Implement sophisticated merge logic from original process_csv_file
-                # For now, simple concatenation
-                merged_df = pd.concat([base_df, additional_df], ignore_index=True)
-                
-                # Save merged result
-                merged_df.to_csv(base_csv_path, index=False)
-                
-                logger.info(f"CSV merge completed: {len(base_df)} + {len(additional_df)} rows")
-                return base_csv_path
-                
-            finally:
-                self.file_service.cleanup_files(additional_csv_path)
+                additional_df = read_excel_frame(additional_csv_path, additional_csv_filename)
+                concat_frames([base_df, additional_df]).to_csv(base_csv_path, index=False)
+                base_rows, additional_rows = len(base_df), len(additional_df)
+            
+            logger.info(f"CSV merge completed: {base_rows} + {additional_rows} rows")
+            return base_csv_path
                 
         except Exception as e:
             logger.error(f"CSV merge failed: {e}")
@@ -214,11 +259,20 @@ class CSVService:
 class BOLProcessingService:
     """Main service for BOL processing orchestration."""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = BOL_MAX_CONCURRENT):
         self.pdf_service = PDFService()
         self.data_service = DataService()
         self.csv_service = CSVService()
         self.file_service = FileService()
+        # Runs ?async=1 jobs after their request returns. Each one holds an
+        # admission slot until it finishes, so one thread per slot is enough
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="bol_pipeline")
+        self.result_cache = ResultCache()
+    
+    def process_async(self, request: ProcessingRequest) -> "Future[ProcessingResult]":
+        """Schedule a request on the pipeline pool and return its future."""
+        return self._executor.submit(self.process, request)
     
     def process(self, request: ProcessingRequest) -> ProcessingResult:
         """Process BOL request and return result."""
@@ -228,13 +282,25 @@ class BOLProcessingService:
             # Validate request
             request.validate()
             
-            # Create working directory
-            working_dir = tempfile.mkdtemp(prefix="bol_api_")
-            logger.info(f"Processing started in: {working_dir}")
+            # Repeat uploads are answered from the result cache
+            cached_result = self._from_cache(request)
+            if cached_result:
+                return cached_result
             
+            # Create working directory (tmpfs when it has room)
+            working_dir = tempfile.mkdtemp(
+                prefix="bol_api_", dir=scratch_root(os.path.getsize(request.pdf_path))
+            )
+            logger.info(f"Processing started in: {working_dir}")
+
+            # The steps run one after another on the calling thread: each one
+            # reads the files the previous one wrote, and text extraction is
+            # pure-Python pdfplumber (no Poppler subprocess to wait on), so
+            # running them on other threads would not overlap any work
+
             # Step 1: Process PDF
             logger.info("Step 1: Processing PDF")
-            self.pdf_service.process_pdf(request.pdf_content, working_dir)
+            self.pdf_service.process_pdf(request.pdf_path, working_dir)
             
             # Step 2: Process extracted data
             logger.info("Step 2: Processing extracted data")
@@ -245,25 +311,37 @@ class BOLProcessingService:
             csv_path = self.csv_service.create_initial_csv(working_dir)
             
             # Step 4: Merge with additional CSV if provided
-            if request.csv_content and request.csv_filename:
+            if request.csv_path and request.csv_filename:
                 logger.info("Step 4: Merging with additional CSV")
                 csv_path = self.csv_service.merge_with_additional_csv(
-                    csv_path, request.csv_content, request.csv_filename
+                    csv_path, request.csv_path, request.csv_filename
                 )
             
-            # Step 5: Read final result
-            with open(csv_path, 'rb') as f:
-                csv_content = f.read()
+            # Step 5: Move final result out of the working directory;
+            # the caller owns the returned file. Same parent dir as working_dir
+            # so os.replace never crosses filesystems.
+            result_fd, result_path = tempfile.mkstemp(
+                prefix="bol_result_", suffix=".csv", dir=os.path.dirname(working_dir)
+            )
+            os.close(result_fd)
+            os.replace(csv_path, result_path)
+            
+            if request.cache_key:
+                try:
+                    self.result_cache.put_file(request.cache_key, result_path)
+                except OSError as e:
+                    logger.warning(f"Failed to cache result: {e}")
             
             logger.info("Processing completed successfully")
             
             return ProcessingResult(
                 status=ProcessingStatus.COMPLETED,
-                csv_content=csv_content,
+                csv_path=result_path,
                 metadata={
                     'pdf_filename': request.pdf_filename,
                     'csv_filename': request.csv_filename,
-                    'output_size': len(csv_content)
+                    'output_size': os.path.getsize(result_path),
+                    'cache_hit': False
                 }
             )
             
@@ -290,19 +368,100 @@ class BOLProcessingService:
             
         finally:
             # Cleanup working directory
-            if working_dir and os.path.exists(working_dir):
+            if working_dir:
                 try:
                     shutil.rmtree(working_dir)
                     logger.debug(f"Cleaned up working directory: {working_dir}")
+                except FileNotFoundError:
+                    pass
                 except Exception as e:
                     logger.warning(f"Failed to cleanup working directory: {e}")
 
+    def _from_cache(self, request: ProcessingRequest) -> Optional[ProcessingResult]:
+        """Return a result backed by a cached CSV, or None on a miss."""
+        # The caller owns (and deletes) the result file, so hand out a link to the entry
+        result_path = self.result_cache.link_entry(request.cache_key) if request.cache_key else None
+        if not result_path:
+            return None
+        
+        logger.info(f"Result cache hit: {request.cache_key}")
+        return ProcessingResult(
+            status=ProcessingStatus.COMPLETED,
+            csv_path=result_path,
+            metadata={
+                'pdf_filename': request.pdf_filename,
+                'csv_filename': request.csv_filename,
+                'output_size': os.path.getsize(result_path),
+                'cache_hit': True
+            }
+        )
+
+# Finished async jobs kept for polling; the oldest finished ones are evicted first
+MAX_RETAINED_JOBS = int(os.getenv('BOL_MAX_RETAINED_JOBS', '100'))
+
+class JobRegistry:
+    """In-process registry of requests submitted with ``?async=1``."""
+    
+    def __init__(self, max_jobs: int = MAX_RETAINED_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def add(self, future: Future) -> str:
+        """Register a job future and return its id."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = future
+            evicted = self._evict_locked()
+        
+        # Result files of evicted jobs are removed outside the lock
+        for old_future in evicted:
+            result = old_future.result()
+            FileService.cleanup_files(result.csv_path)
+        return job_id
+    
+    def get(self, job_id: str) -> Optional[Future]:
+        """Return the future for a job id, or None if unknown or evicted."""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def _evict_locked(self) -> list:
+        """Drop the oldest finished jobs while over capacity."""
+        evicted = []
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].done():
+                evicted.append(self._jobs.pop(job_id))
+        return evicted
+
 # Flask Application
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max
 
+# Let a front server (Apache mod_xsendfile, lighttpd, ...) send result files
+# itself. Needs the result cache, whose entries outlive the request.
+app.config['USE_X_SENDFILE'] = (
+    os.getenv('BOL_USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes') and BOL_CACHE_TTL > 0
+)
+
+# Compress CSV/JSON responses when Flask-Compress is installed
+app.config['COMPRESS_MIMETYPES'] = ['text/csv', 'application/json']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_ALGORITHM_STREAMING'] = ['br', 'deflate']  # send_file bodies are streamed
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
+if Compress is not None and not app.config['USE_X_SENDFILE']:
+    # X-Sendfile responses have an empty body; the front server compresses those
+    Compress(app)
+
 # Initialize service
 bol_service = BOLProcessingService()
+job_registry = JobRegistry()
+
+# Admission control: PDF jobs are CPU and memory heavy, so reject instead of
+# queueing. Async jobs hold their slot until they finish.
+_SLOTS = threading.BoundedSemaphore(BOL_MAX_CONCURRENT)
 
 @app.errorhandler(RequestEntityTooLarge)
 def handle_file_too_large(e):
@@ -334,41 +493,77 @@ def health():
 def process_bol():
     """Main processing endpoint with enhanced error handling."""
     
+    if not _SLOTS.acquire(blocking=False):
+        return jsonify({'error': 'Server busy, please retry shortly'}), 503, {'Retry-After': '1'}
+    
+    run_async = request.args.get('async', '').lower() in ('1', 'true', 'yes')
+    upload_dir = None
+    keep_upload_dir = False
     try:
+        # Inside the try, so a full or unwritable scratch dir can't leak the slot
+        upload_dir = tempfile.mkdtemp(prefix="bol_upload_", dir=scratch_root(request.content_length))
+        
+        # Stream uploads to disk instead of buffering them in memory
+        try:
+            upload = stream_multipart_upload(
+                request.stream, request.content_type, upload_dir, ('pdf', 'csv')
+            )
+        except ValueError as e:
+            return jsonify({'error': f'Invalid form data: {str(e)}'}), 400
+        
         # Validate request structure
-        if 'pdf' not in request.files:
+        if 'pdf' not in upload.files:
             return jsonify({'error': 'PDF file required in form data'}), 400
         
-        pdf_file = request.files['pdf']
-        csv_file = request.files.get('csv')
+        pdf_file = upload.files['pdf']
+        csv_file = upload.files.get('csv')
         
         if pdf_file.filename == '':
             return jsonify({'error': 'No PDF file selected'}), 400
         
+        has_csv = csv_file is not None and csv_file.filename != ''
+        
         # Create processing request
         processing_request = ProcessingRequest(
-            pdf_content=pdf_file.read(),
+            pdf_path=pdf_file.path,
             pdf_filename=secure_filename(pdf_file.filename),
-            csv_content=csv_file.read() if csv_file and csv_file.filename != '' else None,
-            csv_filename=secure_filename(csv_file.filename) if csv_file and csv_file.filename != '' else None
+            csv_path=csv_file.path if has_csv else None,
+            csv_filename=secure_filename(csv_file.filename) if has_csv else None,
+            cache_key=cache_key(
+                pdf_file.digest,
+                csv_file.digest if has_csv else None,
+                os.path.splitext(csv_file.filename)[1] if has_csv else ''
+            )
         )
         
-        # Process request
+        if run_async:
+            # Run on the service's pool so the request can return right away
+            future = bol_service.process_async(processing_request)
+            # Uploads must outlive this request; remove them once the job ends
+            keep_upload_dir = True
+            future.add_done_callback(lambda _: _finish_async_job(upload_dir))
+            job_id = job_registry.add(future)
+            logger.info(f"Accepted async job {job_id}")
+            return jsonify({
+                'job_id': job_id,
+                'status': ProcessingStatus.PROCESSING.value,
+                'status_url': f'/process/{job_id}'
+            }), 202
+        
+        # Synchronous requests already run on their own server thread
         result = bol_service.process(processing_request)
         
         # Handle result
         if result.status == ProcessingStatus.COMPLETED:
-            # Return CSV as download
-            with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp:
-                tmp.write(result.csv_content)
-                tmp.flush()
-                
-                return send_file(
-                    tmp.name,
-                    as_attachment=True,
-                    download_name='bol_processed.csv',
-                    mimetype='text/csv'
-                )
+            # With X-Sendfile, hand the front server the persistent cache entry
+            cached_path = None
+            if app.config['USE_X_SENDFILE']:
+                cached_path = bol_service.result_cache.get(processing_request.cache_key)
+            response = _send_result(cached_path or result.csv_path, persistent=bool(cached_path))
+            # send_file already holds an open handle, so the result file
+            # can be unlinked now without cutting the download short
+            FileService.cleanup_files(result.csv_path)
+            return response
         else:
             # Return error
             return jsonify({
@@ -376,9 +571,60 @@ def process_bol():
                 'status': result.status.value
             }), 400
         
+    except RequestEntityTooLarge:
+        raise  # body exceeded MAX_CONTENT_LENGTH while streaming; handled above
     except Exception as e:
         logger.error(f"Request processing error: {e}")
         return jsonify({'error': 'Request processing failed'}), 500
+    finally:
+        if not keep_upload_dir:
+            if upload_dir:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+            _SLOTS.release()
+
+def _finish_async_job(upload_dir: str) -> None:
+    """Release what an async job held once it has finished."""
+    shutil.rmtree(upload_dir, ignore_errors=True)
+    _SLOTS.release()
+
+@app.route('/process/<job_id>', methods=['GET'])
+def process_status(job_id):
+    """Poll an async job; returns the CSV once it has completed."""
+    future = job_registry.get(job_id)
+    if future is None:
+        return jsonify({'error': 'Unknown or expired job id'}), 404
+    
+    if not future.done():
+        return jsonify({'job_id': job_id, 'status': ProcessingStatus.PROCESSING.value}), 202
+    
+    result = future.result()
+    if result.status == ProcessingStatus.COMPLETED:
+        # Kept on disk until the job is evicted, so it can be fetched again
+        return _send_result(result.csv_path, persistent=True)
+    
+    return jsonify({
+        'job_id': job_id,
+        'error': result.error_message,
+        'status': result.status.value
+    }), 400
+
+def _send_result(csv_path: str, persistent: bool = False):
+    """Return a result CSV as a download straight from disk.
+    
+    With X-Sendfile the front server opens ``csv_path`` after this returns,
+    so only files that outlive the request (``persistent``) are passed by
+    path; others are streamed from an already open handle.
+    """
+    source = csv_path
+    if app.config['USE_X_SENDFILE'] and not persistent:
+        source = open(csv_path, 'rb')
+    return send_file(
+        source,
+        as_attachment=True,
+        download_name='bol_processed.csv',
+        mimetype='text/csv',
+        conditional=True
+    )
 
 @app.route('/api/docs', methods=['GET'])
 def api_docs():
@@ -393,14 +639,28 @@ def api_docs():
                     'pdf': 'PDF file (required, multipart/form-data, max 100MB)',
                     'csv': 'CSV/Excel file (optional, multipart/form-data)'
                 },
+                'query': {
+                    'async': 'Set to 1 to return a job id (202) instead of waiting for the CSV'
+                },
                 'response': 'Processed CSV file download or error details',
                 'status_codes': {
                     '200': 'Success - CSV file download',
+                    '202': 'Accepted - async job id (with ?async=1)',
                     '400': 'Bad request - validation or processing error',
                     '413': 'File too large',
                     '500': 'Internal server error'
                 }
             },
+            'GET /process/<job_id>': {
+                'description': 'Poll an async job',
+                'response': 'CSV file download once completed, otherwise job status',
+                'status_codes': {
+                    '200': 'Completed - CSV file download',
+                    '202': 'Still processing',
+                    '400': 'Job failed - error details',
+                    '404': 'Unknown or expired job id'
+                }
+            },
             'GET /health': {
                 'description': 'Service health check',
                 'response': 'Service status and capabilities'
@@ -7,26 +7,35 @@ monitoring, health checks, and production features.
 """
 
 import os
+import math
 import uuid
 import time
+import heapq
+import itertools
+import random
 import asyncio
+import atexit
 import tempfile
 import shutil
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from collections import Counter, OrderedDict
 from dataclasses import dataclass, field
 from enum import Enum
-from concurrent.futures import ThreadPoolExecutor
 import threading
-from queue import Queue, Empty
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 from flask import Flask, request, jsonify, send_file
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
 import pandas as pd
 
+from file_staging import stream_multipart_upload, scratch_root
+
 # Configure structured logging
 logging.basicConfig(
     level=logging.INFO,
@@ -37,9 +46,36 @@ logger = logging.getLogger(__name__)
 # Import core processors
 import sys
 sys.path.append('..')
-from pdf_processor import PDFProcessor
-from data_processor import DataProcessor
-from csv_exporter import CSVExporter
+from csv_exporter import append_frame_rows, concat_frames, merge_csv_files, read_excel_frame
+from approach3_pipeline import run_pipeline
+
+# How long a job (and its result file) is kept after submission
+JOB_RETENTION_SECONDS = 24 * 3600
+
+# Jobs kept in memory before the sweeper starts evicting finished ones
+MAX_RETAINED_JOBS = 100
+
+# Seconds between background sweeps of expired jobs and result files
+SWEEP_INTERVAL = 60
+
+# Workers publish their job counts to MetricsCollector every this many jobs
+# or seconds, whichever comes first
+METRICS_FLUSH_BATCH = 16
+METRICS_FLUSH_INTERVAL = 1.0
+
+# Finished results live here until their job is evicted; worker scratch roots
+# are created in the same temp dir so results can be renamed into place
+RESULTS_DIR = os.path.join(tempfile.gettempdir(), 'bol_results')
+
+# Upper bound on staged upload data (MiB) admitted but not yet processed
+MAX_INFLIGHT_MB = int(os.getenv('BOL_MAX_INFLIGHT_MB', 1024))
+
+# Pipeline pool rebuilds after which /health reports the service unhealthy,
+# so the orchestrator restarts it instead of it crashing job after job
+MAX_CPU_POOL_RESTARTS = int(os.getenv('BOL_MAX_POOL_RESTARTS', 3))
+
+class CapacityError(Exception):
+    """Raised when a job cannot be admitted right now; clients should retry."""
 
 class JobStatus(Enum):
     """Job status enumeration."""
@@ -56,170 +92,458 @@ class Priority(Enum):
     HIGH = 3
     URGENT = 4
 
-@dataclass
+@dataclass(slots=True)  # no per-instance __dict__ for retained jobs
 class ProcessingJob:
     """Processing job model."""
     job_id: str
     status: JobStatus
     priority: Priority
-    pdf_content: bytes
+    pdf_path: str  # staged upload, owned by the job until processed
     pdf_filename: str
-    csv_content: Optional[bytes] = None
+    csv_path: Optional[str] = None
     csv_filename: Optional[str] = None
+    # Wall-clock times are only for the API; durations and expiry use time.monotonic()
     created_at: datetime = field(default_factory=datetime.now)
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    expires_at: float = field(default_factory=lambda: time.monotonic() + JOB_RETENTION_SECONDS)
+    started_mono: Optional[float] = None
+    completed_mono: Optional[float] = None
     error_message: Optional[str] = None
     result_path: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    upload_tokens: int = 0  # MiB held in the engine's UploadBudget
     
     @property
     def processing_time(self) -> Optional[float]:
         """Calculate processing time in seconds."""
-        if self.started_at and self.completed_at:
-            return (self.completed_at - self.started_at).total_seconds()
+        if self.started_mono is not None and self.completed_mono is not None:
+            return self.completed_mono - self.started_mono
         return None
     
     @property
     def is_expired(self) -> bool:
         """Check if job has expired (24 hours)."""
-        return datetime.now() - self.created_at > timedelta(hours=24)
+        return time.monotonic() > self.expires_at
+    
+    def mark_started(self):
+        self.started_mono = time.monotonic()
+        self.started_at = datetime.now()
+    
+    def mark_completed(self):
+        self.completed_mono = time.monotonic()
+        self.completed_at = datetime.now()
 
 class MetricsCollector:
-    """Collect and track processing metrics."""
+    """Collect and track processing metrics.
     
-    def __init__(self):
-        self.jobs_processed = 0
-        self.jobs_failed = 0
-        self.total_processing_time = 0.0
-        self.start_time = datetime.now()
-        self.lock = threading.Lock()
+    Counters are sharded per worker: each worker only ever writes its own
+    slot, so recording needs no lock and readers sum the shards.
+    """
+    
+    __slots__ = ('jobs_processed_shards', 'jobs_failed_shards', 'processing_time_shards', 'start_time')
     
-    def record_success(self, processing_time: float):
+    def __init__(self, num_workers: int = 1):
+        self.jobs_processed_shards = [0] * num_workers
+        self.jobs_failed_shards = [0] * num_workers
+        self.processing_time_shards = [0.0] * num_workers
+        self.start_time = time.monotonic()
+    
+    def record_success(self, processing_time: float, worker_index: int = 0):
         """Record successful job."""
-        with self.lock:
-            self.jobs_processed += 1
-            self.total_processing_time += processing_time
+        self.jobs_processed_shards[worker_index] += 1
+        self.processing_time_shards[worker_index] += processing_time
     
-    def record_failure(self):
+    def record_failure(self, worker_index: int = 0):
         """Record failed job."""
-        with self.lock:
-            self.jobs_failed += 1
+        self.jobs_failed_shards[worker_index] += 1
+    
+    def record_batch(self, successes: int, processing_time: float, failures: int,
+                     worker_index: int = 0):
+        """Record a batch of jobs counted locally by a worker."""
+        self.jobs_processed_shards[worker_index] += successes
+        self.processing_time_shards[worker_index] += processing_time
+        self.jobs_failed_shards[worker_index] += failures
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get current metrics."""
+        jobs_processed = sum(self.jobs_processed_shards)
+        jobs_failed = sum(self.jobs_failed_shards)
+        total_processing_time = sum(self.processing_time_shards)
+        
+        uptime = time.monotonic() - self.start_time
+        avg_processing_time = (
+            total_processing_time / jobs_processed 
+            if jobs_processed > 0 else 0
+        )
+        
+        return {
+            'uptime_seconds': uptime,
+            'jobs_processed': jobs_processed,
+            'jobs_failed': jobs_failed,
+            'success_rate': (
+                jobs_processed / (jobs_processed + jobs_failed)
+                if (jobs_processed + jobs_failed) > 0 else 0
+            ),
+            'average_processing_time_seconds': avg_processing_time,
+            'jobs_per_hour': jobs_processed / (uptime / 3600) if uptime > 0 else 0
+        }
+
+class UploadBudget:
+    """Admission control on the size of staged uploads that are not yet processed.
+    
+    Counts 1 MiB tokens; unlike a threading.Semaphore it can take a job's
+    whole token count in one step.
+    """
+    
+    def __init__(self, capacity_mb: int = MAX_INFLIGHT_MB):
+        self.capacity_mb = capacity_mb
+        self.used_mb = 0
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def tokens_for(*paths: Optional[str]) -> int:
+        """Tokens needed for the given files (at least one per job)."""
+        total = sum(os.path.getsize(path) for path in paths if path)
+        return max(1, math.ceil(total / (1024 * 1024)))
+    
+    def try_acquire(self, tokens: int) -> bool:
+        """Reserve ``tokens`` if they fit in the budget."""
         with self.lock:
-            uptime = (datetime.now() - self.start_time).total_seconds()
-            avg_processing_time = (
-                self.total_processing_time / self.jobs_processed 
-                if self.jobs_processed > 0 else 0
-            )
-            
-            return {
-                'uptime_seconds': uptime,
-                'jobs_processed': self.jobs_processed,
-                'jobs_failed': self.jobs_failed,
-                'success_rate': (
-                    self.jobs_processed / (self.jobs_processed + self.jobs_failed)
-                    if (self.jobs_processed + self.jobs_failed) > 0 else 0
-                ),
-                'average_processing_time_seconds': avg_processing_time,
-                'jobs_per_hour': self.jobs_processed / (uptime / 3600) if uptime > 0 else 0
-            }
+            if self.used_mb + tokens > self.capacity_mb:
+                return False
+            self.used_mb += tokens
+            return True
+    
+    def release(self, job: ProcessingJob):
+        """Return the job's tokens; safe to call more than once."""
+        with self.lock:
+            self.used_mb -= job.upload_tokens
+            job.upload_tokens = 0
 
 class JobQueue:
-    """Priority job queue for processing."""
+    """Priority job queue for processing.
+    
+    Queued entries are spread over several heaps, each with its own lock
+    (a MultiQueue): producers push to a random heap and workers pop the
+    better top of two random heaps. Workers rarely contend, at the cost of
+    priority order being approximate rather than strict.
+    """
     
-    def __init__(self, max_size: int = 100):
-        self.queue = Queue(maxsize=max_size)
-        self.jobs: Dict[str, ProcessingJob] = {}
+    def __init__(self, max_size: int = 100, upload_budget: Optional[UploadBudget] = None,
+                 num_shards: int = 4):
+        self.max_size = max_size  # queued (not yet started) jobs admitted at once
+        self.upload_budget = upload_budget
+        # Kept in LRU order (get_job moves a job to the end), oldest first
+        self.jobs: "OrderedDict[str, ProcessingJob]" = OrderedDict()
+        # Min-heap of (expiry time, job_id); entries of already evicted jobs are skipped
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # Jobs per status, kept up to date by _set_status and evictions
+        self.status_counts: Counter = Counter()
         self.lock = threading.Lock()
+        # (lock, heap of (-priority, seq, job_id)): highest priority first, FIFO within a priority
+        self._shards: List[Tuple[threading.Lock, List[tuple]]] = [
+            (threading.Lock(), []) for _ in range(max(2, num_shards))
+        ]
+        # One token per queued entry, so idle workers block instead of scanning shards
+        self._available = threading.Semaphore(0)
+        self._stop = False
+        self._seq = itertools.count()
+        # Expiry is handled off the request and worker paths by a sweeper thread
+        self._sweep_stop = threading.Event()
+        self._sweeper_thread = threading.Thread(target=self._sweeper, name="job-sweeper", daemon=True)
+        self._sweeper_thread.start()
     
     def add_job(self, job: ProcessingJob) -> bool:
-        """Add job to queue."""
+        """Add job to queue.
+        
+        Raises ``CapacityError`` when ``max_size`` jobs are already queued.
+        """
         try:
             with self.lock:
-                if len(self.jobs) >= 100:  # Limit total jobs
-                    self._cleanup_expired_jobs()
-                
+                if self.status_counts[JobStatus.QUEUED] >= self.max_size:
+                    raise CapacityError("Job queue is full - please retry shortly")
                 self.jobs[job.job_id] = job
-                self.queue.put((job.priority.value, job.job_id), timeout=1)
-                logger.info(f"Job {job.job_id} queued with priority {job.priority.name}")
-                return True
+                self.status_counts[job.status] += 1
+                heapq.heappush(self._expiry_heap, (job.expires_at, job.job_id))
+            
+            shard_lock, heap = random.choice(self._shards)
+            with shard_lock:
+                heapq.heappush(heap, (-job.priority.value, next(self._seq), job.job_id))
+            self._available.release()
+            logger.info(f"Job {job.job_id} queued with priority {job.priority.name}")
+            return True
                 
+        except CapacityError:
+            raise
         except Exception as e:
             logger.error(f"Failed to queue job {job.job_id}: {e}")
             return False
     
-    def get_next_job(self, timeout: float = 1.0) -> Optional[ProcessingJob]:
-        """Get next job from queue."""
-        try:
-            _, job_id = self.queue.get(timeout=timeout)
-            with self.lock:
-                job = self.jobs.get(job_id)
-                if job and not job.is_expired:
-                    job.status = JobStatus.PROCESSING
-                    job.started_at = datetime.now()
-                    return job
-                else:
-                    # Job expired or not found
-                    if job:
-                        job.status = JobStatus.EXPIRED
-                    return None
-        except Empty:
+    def get_next_job(self, timeout: Optional[float] = None) -> Optional[ProcessingJob]:
+        """Get next job from queue, blocking until one arrives (or ``timeout``).
+        
+        Returns None on timeout, for expired jobs and once close() was called.
+        """
+        if not self._available.acquire(timeout=timeout):
+            return None
+        if self._stop:
+            self._available.release()  # pass the wake-up on to the next waiter
             return None
+        
+        _, _, job_id = self._pop_entry()
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job and not job.is_expired:
+                self._set_status(job, JobStatus.PROCESSING)
+                job.mark_started()
+                return job
+            else:
+                # Job expired or not found
+                if job:
+                    self._set_status(job, JobStatus.EXPIRED)
+                    self._release_budget(job)
+                return None
+    
+    def _pop_entry(self) -> tuple:
+        """Pop a queued entry; the caller must hold a token from ``_available``."""
+        for _ in range(len(self._shards)):
+            (lock_a, heap_a), (lock_b, heap_b) = random.sample(self._shards, 2)
+            if not lock_a.acquire(blocking=False):
+                continue
+            try:
+                if not lock_b.acquire(blocking=False):
+                    continue
+                try:
+                    if heap_a and (not heap_b or heap_a[0] < heap_b[0]):
+                        return heapq.heappop(heap_a)
+                    if heap_b:
+                        return heapq.heappop(heap_b)
+                finally:
+                    lock_b.release()
+            finally:
+                lock_a.release()
+        
+        # Unlucky picks (busy or empty shards): take the best top of all shards.
+        # Tokens are only released after their push, so some shard is non-empty.
+        for lock, _ in self._shards:
+            lock.acquire()
+        try:
+            heap = min((h for _, h in self._shards if h), key=lambda h: h[0])
+            return heapq.heappop(heap)
+        finally:
+            for lock, _ in self._shards:
+                lock.release()
     
     def get_job(self, job_id: str) -> Optional[ProcessingJob]:
         """Get job by ID."""
         with self.lock:
-            return self.jobs.get(job_id)
+            job = self.jobs.get(job_id)
+            if job:
+                self.jobs.move_to_end(job_id)
+            return job
+    
+    def set_status(self, job: ProcessingJob, status: JobStatus):
+        """Move a job to a new status, keeping the status counts in sync."""
+        with self.lock:
+            self._set_status(job, status)
+    
+    def _set_status(self, job: ProcessingJob, status: JobStatus):
+        """Change ``job.status``; must be called with ``self.lock`` held."""
+        if self.jobs.get(job.job_id) is job:  # evicted jobs are no longer counted
+            self.status_counts[job.status] -= 1
+            self.status_counts[status] += 1
+        job.status = status
     
     def update_job(self, job: ProcessingJob):
         """Update job status."""
         with self.lock:
             self.jobs[job.job_id] = job
     
-    def _cleanup_expired_jobs(self):
-        """Remove expired jobs."""
-        expired_jobs = [
-            job_id for job_id, job in self.jobs.items()
-            if job.is_expired or job.status in [JobStatus.COMPLETED, JobStatus.FAILED]
-        ]
+    def _cleanup_expired_jobs(self) -> List[str]:
+        """Evict old jobs; returns their files for the caller to delete.
         
-        for job_id in expired_jobs[:50]:  # Remove up to 50 old jobs
+        Expired jobs come off the expiry heap first. If more than
+        ``MAX_RETAINED_JOBS`` remain, finished jobs are evicted least recently
+        used first. Must be called with ``self.lock`` held. The files are not
+        touched here so that no disk I/O happens while the lock is held.
+        """
+        evicted = []
+        now = time.monotonic()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, job_id = heapq.heappop(self._expiry_heap)
             job = self.jobs.pop(job_id, None)
-            if job and job.result_path and os.path.exists(job.result_path):
-                try:
-                    os.unlink(job.result_path)
-                except Exception as e:
-                    logger.warning(f"Failed to cleanup result file: {e}")
+            if job:
+                evicted.append(job)
+        
+        excess = len(self.jobs) - MAX_RETAINED_JOBS
+        if excess > 0:
+            finished = []
+            for job in self.jobs.values():
+                if job.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+                    finished.append(job)
+                    if len(finished) >= excess:
+                        break
+            for job in finished:
+                del self.jobs[job.job_id]
+            evicted.extend(finished)
+        
+        stale_paths = []
+        for job in evicted:
+            self.status_counts[job.status] -= 1
+            if job.result_path:
+                stale_paths.append(job.result_path)
+            if job.status != JobStatus.PROCESSING:
+                # Expired before a worker got to it: drop the staged upload too
+                stale_paths.append(os.path.dirname(job.pdf_path))
+                self._release_budget(job)
         
-        logger.info(f"Cleaned up {len(expired_jobs)} expired jobs")
+        if evicted:
+            logger.info(f"Cleaned up {len(evicted)} expired jobs")
+        return stale_paths
+    
+    def _sweeper(self):
+        """Background loop running sweep() every SWEEP_INTERVAL seconds."""
+        while not self._sweep_stop.wait(SWEEP_INTERVAL):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning(f"Job sweep failed: {e}")
+    
+    def sweep(self):
+        """Evict expired jobs and delete their files and stale result files."""
+        with self.lock:
+            stale_paths = self._cleanup_expired_jobs()
+        self._remove_files(stale_paths)
+        
+        # Results nobody tracks any more (e.g. left by a previous process)
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        try:
+            with os.scandir(RESULTS_DIR) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.csv') and entry.stat().st_mtime < cutoff:
+                        self._remove_files([entry.path])
+        except FileNotFoundError:
+            pass
+    
+    def pending_count(self) -> int:
+        """Number of queued entries (unlocked, approximate)."""
+        return sum(len(heap) for _, heap in self._shards)
+    
+    def close(self):
+        """Wake all blocked workers and stop the sweeper thread."""
+        self._stop = True
+        self._available.release()
+        self._sweep_stop.set()
+    
+    def discard_upload(self, job: ProcessingJob):
+        """Remove the job's staged uploads and return its upload budget."""
+        shutil.rmtree(os.path.dirname(job.pdf_path), ignore_errors=True)
+        self._release_budget(job)
+    
+    def _release_budget(self, job: ProcessingJob):
+        if self.upload_budget:
+            self.upload_budget.release(job)
+    
+    @staticmethod
+    def _remove_files(paths: List[str]):
+        """Delete result files and upload dirs of evicted jobs (call without the lock)."""
+        for path in paths:
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to cleanup result file: {e}")
     
     def get_queue_status(self) -> Dict[str, Any]:
         """Get queue status."""
         with self.lock:
-            status_counts = {}
-            for status in JobStatus:
-                status_counts[status.value] = sum(
-                    1 for job in self.jobs.values() if job.status == status
-                )
+            status_counts = {status.value: self.status_counts[status] for status in JobStatus}
             
             return {
                 'total_jobs': len(self.jobs),
-                'queue_size': self.queue.qsize(),
+                'queue_size': self.pending_count(),
                 'status_breakdown': status_counts
             }
 
+class PipelinePool:
+    """Process pool running ``run_pipeline``, rebuilt when one of its processes dies.
+    
+    A child killed mid-job (OOM, crash inside PDFium) breaks the whole
+    executor; without a rebuild every later job would fail. The processes
+    come from a fork server preloading only approach3_pipeline, so a rebuild
+    is safe while the worker and sweeper threads are running.
+    """
+    
+    def __init__(self, num_workers: int):
+        self.num_workers = num_workers
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            self.context = multiprocessing.get_context('forkserver')
+            self.context.set_forkserver_preload(['approach3_pipeline'])
+        else:
+            self.context = multiprocessing.get_context('spawn')
+        self.lock = threading.Lock()
+        self.restarts = 0
+        self.broken = False  # set when a rebuild itself failed
+        self.executor = self._new_executor()
+    
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.num_workers, mp_context=self.context)
+    
+    @property
+    def healthy(self) -> bool:
+        return not self.broken and self.restarts <= MAX_CPU_POOL_RESTARTS
+    
+    def run(self, working_dir: str, pdf_path: str, pdf_filename: str) -> str:
+        """Run the pipeline for one job in a pool process; returns the CSV path."""
+        executor = self.executor
+        try:
+            return executor.submit(run_pipeline, working_dir, pdf_path, pdf_filename).result()
+        except BrokenProcessPool:
+            # The job is failed rather than retried: it may be what killed the child
+            self._replace(executor)
+            raise
+    
+    def _replace(self, broken: ProcessPoolExecutor):
+        """Swap in a new executor for ``broken`` unless another worker already did."""
+        with self.lock:
+            if self.executor is not broken:
+                return
+            self.restarts += 1
+            logger.error(f"Pipeline pool broken, rebuilding it (restart {self.restarts})")
+            broken.shutdown(wait=False, cancel_futures=True)
+            try:
+                self.executor = self._new_executor()
+            except Exception as e:
+                logger.error(f"Failed to rebuild the pipeline pool: {e}")
+                self.broken = True
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
 class ProcessingWorker:
     """Worker for processing jobs."""
     
-    def __init__(self, worker_id: str, job_queue: JobQueue, metrics: MetricsCollector):
+    def __init__(self, worker_id: str, job_queue: JobQueue, metrics: MetricsCollector,
+                 cpu_pool: PipelinePool, work_root: str, worker_index: int = 0):
         self.worker_id = worker_id
+        self.worker_index = worker_index  # this worker's metrics shard
         self.job_queue = job_queue
+        self.cpu_pool = cpu_pool
         self.metrics = metrics
         self.running = False
         self.current_job_id = None
+        # Job counts buffered here and handed to MetricsCollector in batches
+        self._local_success = 0
+        self._local_failed = 0
+        self._local_time = 0.0
+        self._local_flush_at = time.monotonic() + METRICS_FLUSH_INTERVAL
+        # Shared scratch root (owned by the engine); each job gets a plain subdirectory
+        self.work_root = work_root
     
     def start(self):
         """Start the worker."""
@@ -228,7 +552,10 @@ class ProcessingWorker:
         
         while self.running:
             try:
-                job = self.job_queue.get_next_job(timeout=1.0)
+                if self.job_queue.pending_count() == 0:
+                    # About to sleep until the next job: publish what we have
+                    self._flush_metrics(force=True)
+                job = self.job_queue.get_next_job()
                 if job:
                     self.current_job_id = job.job_id
                     self._process_job(job)
@@ -238,6 +565,23 @@ class ProcessingWorker:
                 logger.error(f"Worker {self.worker_id} error: {e}")
                 if self.current_job_id:
                     self._fail_current_job(str(e))
+            
+            self._flush_metrics()
+        
+        self._flush_metrics(force=True)
+    
+    def _flush_metrics(self, force: bool = False):
+        """Push the locally buffered job counts to the shared metrics."""
+        pending = self._local_success + self._local_failed
+        if not force and pending < METRICS_FLUSH_BATCH and time.monotonic() < self._local_flush_at:
+            return
+        if pending:
+            self.metrics.record_batch(self._local_success, self._local_time,
+                                      self._local_failed, self.worker_index)
+            self._local_success = 0
+            self._local_failed = 0
+            self._local_time = 0.0
+        self._local_flush_at = time.monotonic() + METRICS_FLUSH_INTERVAL
     
     def stop(self):
         """Stop the worker."""
@@ -251,27 +595,23 @@ class ProcessingWorker:
         working_dir = None
         try:
             # Create working directory
-            working_dir = tempfile.mkdtemp(prefix=f"bol_job_{job.job_id}_")
-            
-            # Step 1: Process PDF
-            self._process_pdf(job, working_dir)
+            working_dir = os.path.join(self.work_root, job.job_id)
+            os.mkdir(working_dir)
             
-            # Step 2: Process data
-            self._process_data(working_dir)
-            
-            # Step 3: Create CSV
-            csv_path = self._create_csv(working_dir)
+            # Steps 1-3 are CPU-bound Python; run them in the process pool so
+            # workers are not serialized on the GIL
+            csv_path = self.cpu_pool.run(working_dir, job.pdf_path, job.pdf_filename)
             
             # Step 4: Merge additional CSV if provided
-            if job.csv_content and job.csv_filename:
+            if job.csv_path and job.csv_filename:
                 csv_path = self._merge_csv(csv_path, job)
             
             # Step 5: Save result
             result_path = self._save_result(csv_path, job.job_id)
             
             # Update job
-            job.status = JobStatus.COMPLETED
-            job.completed_at = datetime.now()
+            self.job_queue.set_status(job, JobStatus.COMPLETED)
+            job.mark_completed()
             job.result_path = result_path
             job.metadata.update({
                 'worker_id': self.worker_id,
@@ -280,20 +620,24 @@ class ProcessingWorker:
             })
             
             self.job_queue.update_job(job)
-            self.metrics.record_success(job.processing_time)
+            self._local_success += 1
+            self._local_time += job.processing_time
             
             logger.info(f"Job {job.job_id} completed in {job.processing_time:.2f}s")
             
         except Exception as e:
             logger.error(f"Job {job.job_id} failed: {e}")
-            job.status = JobStatus.FAILED
-            job.completed_at = datetime.now()
+            self.job_queue.set_status(job, JobStatus.FAILED)
+            job.mark_completed()
             job.error_message = str(e)
             
             self.job_queue.update_job(job)
-            self.metrics.record_failure()
+            self._local_failed += 1
             
         finally:
+            # The staged uploads are no longer needed once the job has run
+            self.job_queue.discard_upload(job)
+            
             # Cleanup working directory
             if working_dir and os.path.exists(working_dir):
                 try:
@@ -301,75 +645,43 @@ class ProcessingWorker:
                 except Exception as e:
                     logger.warning(f"Failed to cleanup working dir: {e}")
     
-    def _process_pdf(self, job: ProcessingJob, working_dir: str):
-        """Process PDF step."""
-        pdf_path = os.path.join(working_dir, job.pdf_filename)
-        with open(pdf_path, 'wb') as f:
-            f.write(job.pdf_content)
-        
-        processor = PDFProcessor(working_dir)
-        if not processor.process_first_pdf():
-            raise Exception("PDF processing failed")
-    
-    def _process_data(self, working_dir: str):
-        """Process data step."""
-        processor = DataProcessor()
-        processor.session_dir = working_dir
-        processor.invoice_data = {}
-        
-        if not processor.process_all_files():
-            raise Exception("Data processing failed")
-    
-    def _create_csv(self, working_dir: str) -> str:
-        """Create CSV step."""
-        exporter = CSVExporter(working_dir)
-        if not exporter.combine_to_csv():
-            raise Exception("CSV creation failed")
-        
-        csv_path = os.path.join(working_dir, "combined_data.csv")
-        if not os.path.exists(csv_path):
-            raise Exception("CSV file not created")
-        
-        return csv_path
-    
     def _merge_csv(self, base_csv_path: str, job: ProcessingJob) -> str:
         """Merge CSV step."""
-        # Save additional CSV
+        # The additional file is read straight from its staged upload
         ext = os.path.splitext(job.csv_filename)[1]
-        additional_csv_path = os.path.join(
-            os.path.dirname(base_csv_path), 
-            f"additional{ext}"
-        )
+        additional_csv_path = job.csv_path
         
-        with open(additional_csv_path, 'wb') as f:
-            f.write(job.csv_content)
+        # Simple merge for now
+        if ext.lower() == '.csv':
+            # Same header: raw byte append; otherwise pyarrow (when installed) or pandas
+            base_rows, additional_rows = merge_csv_files(base_csv_path, additional_csv_path)
+            logger.info(f"Job {job.job_id} merged {base_rows} + {additional_rows} rows")
+            return base_csv_path
         
-        try:
-            # Read and merge
-            base_df = pd.read_csv(base_csv_path, dtype=str)
-            
-            if ext.lower() == '.csv':
-                additional_df = pd.read_csv(additional_csv_path, dtype=str)
-            else:
-                additional_df = pd.read_excel(additional_csv_path, dtype=str)
-            
-            # Simple merge for now
-            merged_df = pd.concat([base_df, additional_df], ignore_index=True)
-            merged_df.to_csv(base_csv_path, index=False)
-            
+        additional_df = read_excel_frame(additional_csv_path, job.csv_filename)
+        
+        # Same columns as the base CSV: append the sheet's rows, base stays untouched
+        additional_rows = append_frame_rows(base_csv_path, additional_df)
+        if additional_rows is not None:
+            logger.info(f"Job {job.job_id} appended {additional_rows} rows")
             return base_csv_path
-            
-        finally:
-            if os.path.exists(additional_csv_path):
-                os.unlink(additional_csv_path)
+        
+        base_df = pd.read_csv(base_csv_path, dtype=str)
+        concat_frames([base_df, additional_df]).to_csv(base_csv_path, index=False)
+        logger.info(f"Job {job.job_id} merged {len(base_df)} + {len(additional_df)} rows")
+        return base_csv_path
     
     def _save_result(self, csv_path: str, job_id: str) -> str:
         """Save final result."""
-        results_dir = os.path.join(tempfile.gettempdir(), 'bol_results')
-        os.makedirs(results_dir, exist_ok=True)
+        os.makedirs(RESULTS_DIR, exist_ok=True)
         
-        result_path = os.path.join(results_dir, f"result_{job_id}.csv")
-        shutil.copy2(csv_path, result_path)
+        result_path = os.path.join(RESULTS_DIR, f"result_{job_id}.csv")
+        # The working dir is deleted right after this, so move instead of copy:
+        # a rename when both are on the same filesystem (the default)
+        try:
+            os.replace(csv_path, result_path)
+        except OSError:
+            shutil.move(csv_path, result_path)
         
         return result_path
     
@@ -378,51 +690,89 @@ class ProcessingWorker:
         if self.current_job_id:
             job = self.job_queue.get_job(self.current_job_id)
             if job:
-                job.status = JobStatus.FAILED
-                job.completed_at = datetime.now()
+                self.job_queue.set_status(job, JobStatus.FAILED)
+                job.mark_completed()
                 job.error_message = error_message
                 self.job_queue.update_job(job)
-                self.metrics.record_failure()
+                self._local_failed += 1
 
 class ProcessingEngine:
     """Main processing engine with worker management."""
     
     def __init__(self, num_workers: int = 2):
-        self.job_queue = JobQueue()
-        self.metrics = MetricsCollector()
+        # The GIL-heavy pipeline steps run in these processes; started from a
+        # fork server, so neither this nor a later rebuild forks the threads
+        self.cpu_pool = PipelinePool(num_workers)
+        
+        self.upload_budget = UploadBudget(MAX_INFLIGHT_MB)
+        self.job_queue = JobQueue(upload_budget=self.upload_budget, num_shards=2 * num_workers)
+        self.metrics = MetricsCollector(num_workers)
         self.workers = []
-        self.executor = ThreadPoolExecutor(max_workers=num_workers)
+        self._threads: List[threading.Thread] = []
         self.num_workers = num_workers
         
-        # Start workers
+        # Job working dirs live under one root, removed at shutdown or, as
+        # the engine is built at import, at interpreter exit without one.
+        # It sits next to RESULTS_DIR rather than on scratch_root() (tmpfs),
+        # so _save_result can rename results into place instead of copying
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        self.work_root = tempfile.mkdtemp(prefix="bol_workers_", dir=os.path.dirname(RESULTS_DIR))
+        atexit.register(shutil.rmtree, self.work_root, ignore_errors=True)
+        if os.stat(self.work_root).st_dev != os.stat(RESULTS_DIR).st_dev:
+            logger.warning(f"{RESULTS_DIR} is on another filesystem than {self.work_root}; "
+                           "results will be copied instead of renamed")
+        
+        # Start workers, one long-lived daemon thread each
         for i in range(num_workers):
-            worker = ProcessingWorker(f"worker-{i}", self.job_queue, self.metrics)
+            worker = ProcessingWorker(f"worker-{i}", self.job_queue, self.metrics,
+                                      self.cpu_pool, self.work_root, worker_index=i)
             self.workers.append(worker)
-            self.executor.submit(worker.start)
+            thread = threading.Thread(target=worker.start, name=f"worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
         
         logger.info(f"Processing engine started with {num_workers} workers")
     
-    def submit_job(self, pdf_content: bytes, pdf_filename: str, 
-                  csv_content: Optional[bytes] = None, 
+    def submit_job(self, pdf_path: str, pdf_filename: str, 
+                  csv_path: Optional[str] = None, 
                   csv_filename: Optional[str] = None,
                   priority: Priority = Priority.NORMAL) -> str:
-        """Submit a new processing job."""
+        """Submit a new processing job.
+        
+        The staged files at ``pdf_path``/``csv_path`` must live in a directory
+        of their own; the job owns and removes it once processed or expired.
+        Raises ``CapacityError`` when the upload budget is exhausted or the
+        queue is full.
+        """
+        
+        # Admission is bounded by staged bytes rather than by job count
+        tokens = UploadBudget.tokens_for(pdf_path, csv_path)
+        if not self.upload_budget.try_acquire(tokens):
+            raise CapacityError("Too much upload data queued - please retry shortly")
         
         job_id = str(uuid.uuid4())
         job = ProcessingJob(
             job_id=job_id,
             status=JobStatus.QUEUED,
             priority=priority,
-            pdf_content=pdf_content,
+            pdf_path=pdf_path,
             pdf_filename=pdf_filename,
-            csv_content=csv_content,
-            csv_filename=csv_filename
+            csv_path=csv_path,
+            csv_filename=csv_filename,
+            upload_tokens=tokens
         )
         
-        if self.job_queue.add_job(job):
+        try:
+            queued = self.job_queue.add_job(job)
+        except CapacityError:
+            self.upload_budget.release(job)
+            raise
+        
+        if queued:
             logger.info(f"Job {job_id} submitted successfully")
             return job_id
         else:
+            self.upload_budget.release(job)
             raise Exception("Failed to queue job - system may be overloaded")
     
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
@@ -442,33 +792,40 @@ class ProcessingEngine:
             'metadata': job.metadata
         }
     
-    def get_result(self, job_id: str) -> Optional[bytes]:
-        """Get job result."""
+    def get_result_path(self, job_id: str) -> Optional[str]:
+        """Get the path of a completed job's result file."""
         job = self.job_queue.get_job(job_id)
         if not job or job.status != JobStatus.COMPLETED or not job.result_path:
             return None
-        
-        try:
-            with open(job.result_path, 'rb') as f:
-                return f.read()
-        except Exception as e:
-            logger.error(f"Failed to read result for job {job_id}: {e}")
-            return None
+        return job.result_path
+    
+    def is_healthy(self) -> bool:
+        """False once the pipeline pool keeps dying or cannot be rebuilt."""
+        return self.cpu_pool.healthy
     
     def get_system_status(self) -> Dict[str, Any]:
         """Get comprehensive system status."""
         return {
-            'engine_status': 'running',
+            'engine_status': 'running' if self.is_healthy() else 'unhealthy',
             'workers': {
                 'total': len(self.workers),
                 'active': len([w for w in self.workers if w.running]),
                 'current_jobs': [w.current_job_id for w in self.workers if w.current_job_id]
             },
+            'cpu_pool': {
+                'processes': self.cpu_pool.num_workers,
+                'restarts': self.cpu_pool.restarts,
+                'healthy': self.cpu_pool.healthy
+            },
             'queue': self.job_queue.get_queue_status(),
             'metrics': self.metrics.get_metrics(),
             'system': {
                 'temp_dir': tempfile.gettempdir(),
                 'max_file_size': '100MB',
+                'upload_budget_mb': {
+                    'used': self.upload_budget.used_mb,
+                    'capacity': self.upload_budget.capacity_mb
+                },
                 'job_retention': '24 hours'
             }
         }
@@ -479,16 +836,22 @@ class ProcessingEngine:
         
         for worker in self.workers:
             worker.stop()
+        self.job_queue.close()  # wakes workers blocked waiting for a job
         
-        self.executor.shutdown(wait=True, timeout=30)
+        for thread in self._threads:
+            thread.join(timeout=30)
+        
+        self.cpu_pool.shutdown()
+        shutil.rmtree(self.work_root, ignore_errors=True)
         logger.info("Processing engine shutdown complete")
 
 # Flask Application
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max
 
-# Initialize processing engine
-engine = ProcessingEngine(num_workers=2)
+# Initialize processing engine; not in pipeline pool processes, which re-run
+# this module as __mp_main__ when it is started as a script
+engine = ProcessingEngine(num_workers=2) if __name__ != '__mp_main__' else None
 
 @app.errorhandler(RequestEntityTooLarge)
 def handle_file_too_large(e):
@@ -497,14 +860,16 @@ def handle_file_too_large(e):
 @app.route('/health', methods=['GET'])
 def health():
     """Comprehensive health check."""
+    # 503 once the engine cannot process jobs, so the orchestrator restarts it
+    healthy = engine.is_healthy()
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if healthy else 'unhealthy',
         'service': 'BOL Processing API',
         'approach': 'production_microservice',
         'version': '3.0',
         'timestamp': datetime.now().isoformat(),
         'system_status': engine.get_system_status()
-    })
+    }), 200 if healthy else 503
 
 @app.route('/metrics', methods=['GET'])
 def metrics():
@@ -514,13 +879,26 @@ def metrics():
 @app.route('/submit', methods=['POST'])
 def submit_job():
     """Submit processing job."""
+    # Uploads are streamed to disk and handed to the job; only their paths are queued
+    upload_dir = None
+    submitted = False
     try:
-        if 'pdf' not in request.files:
+        # Inside the try, so a full or unwritable scratch dir gets the JSON 500
+        upload_dir = tempfile.mkdtemp(prefix="bol_upload_", dir=scratch_root(request.content_length))
+        
+        try:
+            upload = stream_multipart_upload(
+                request.stream, request.content_type, upload_dir, ('pdf', 'csv')
+            )
+        except ValueError as e:
+            return jsonify({'error': f'Invalid multipart form data: {str(e)}'}), 400
+        
+        if 'pdf' not in upload.files:
             return jsonify({'error': 'PDF file required'}), 400
         
-        pdf_file = request.files['pdf']
-        csv_file = request.files.get('csv')
-        priority_str = request.form.get('priority', 'normal').upper()
+        pdf_file = upload.files['pdf']
+        csv_file = upload.files.get('csv')
+        priority_str = upload.form.get('priority', 'normal').upper()
         
         try:
             priority = Priority[priority_str]
@@ -530,14 +908,17 @@ def submit_job():
         if pdf_file.filename == '':
             return jsonify({'error': 'No PDF file selected'}), 400
         
+        has_csv = csv_file is not None and csv_file.filename != ''
+        
         # Submit job
         job_id = engine.submit_job(
-            pdf_content=pdf_file.read(),
+            pdf_path=pdf_file.path,
             pdf_filename=secure_filename(pdf_file.filename),
-            csv_content=csv_file.read() if csv_file and csv_file.filename != '' else None,
-            csv_filename=secure_filename(csv_file.filename) if csv_file and csv_file.filename != '' else None,
+            csv_path=csv_file.path if has_csv else None,
+            csv_filename=secure_filename(csv_file.filename) if has_csv else None,
             priority=priority
         )
+        submitted = True
         
         return jsonify({
             'job_id': job_id,
@@ -547,9 +928,16 @@ def submit_job():
             'result_url': f'/result/{job_id}'
         }), 202
         
+    except RequestEntityTooLarge:
+        raise  # body exceeded MAX_CONTENT_LENGTH while streaming
+    except CapacityError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         logger.error(f"Job submission error: {e}")
         return jsonify({'error': str(e)}), 500
+    finally:
+        if not submitted and upload_dir:
+            shutil.rmtree(upload_dir, ignore_errors=True)
 
 @app.route('/status/<job_id>', methods=['GET'])
 def get_job_status(job_id: str):
@@ -563,20 +951,22 @@ def get_job_status(job_id: str):
 @app.route('/result/<job_id>', methods=['GET'])
 def get_job_result(job_id: str):
     """Download job result."""
-    result = engine.get_result(job_id)
-    if not result:
+    result_path = engine.get_result_path(job_id)
+    if not result_path:
         return jsonify({'error': 'Result not available'}), 404
     
-    with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp:
-        tmp.write(result)
-        tmp.flush()
-        
+    # Served straight from the stored result; supports conditional/range requests
+    try:
         return send_file(
-            tmp.name,
+            result_path,
             as_attachment=True,
             download_name=f'bol_result_{job_id}.csv',
-            mimetype='text/csv'
+            mimetype='text/csv',
+            conditional=True
         )
+    except FileNotFoundError:
+        logger.error(f"Result file missing for job {job_id}")
+        return jsonify({'error': 'Result not available'}), 404
 
 @app.route('/api/docs', methods=['GET'])
 def api_docs():
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+CPU-bound pipeline steps of the Approach 3 microservice
+=======================================================
+Run in the microservice's process pool. Kept apart from
+approach3_microservice so pool processes import only this module,
+not the Flask app and its processing engine.
+"""
+
+import os
+import shutil
+from typing import Optional, Tuple
+
+from pdf_processor import PDFProcessor
+from data_processor import DataProcessor
+from csv_exporter import CSVExporter
+
+# Processor instances of the current CPU-pool process, reused across jobs so
+# their constructor work (Poppler probe, session dir setup) happens once
+_processors: Optional[Tuple[PDFProcessor, DataProcessor, CSVExporter]] = None
+
+def _get_processors() -> Tuple[PDFProcessor, DataProcessor, CSVExporter]:
+    global _processors
+    if _processors is None:
+        _processors = (PDFProcessor(None), DataProcessor(), CSVExporter(None))
+    return _processors
+
+def _process_pdf(working_dir: str, pdf_path: str, pdf_filename: str):
+    """Process PDF step."""
+    shutil.move(pdf_path, os.path.join(working_dir, pdf_filename))
+    
+    processor = _get_processors()[0]
+    processor.reset(working_dir)
+    if not processor.process_first_pdf():
+        raise Exception("PDF processing failed")
+
+def _process_data(working_dir: str):
+    """Process data step."""
+    processor = _get_processors()[1]
+    processor.reset(working_dir)
+    
+    if not processor.process_all_files():
+        raise Exception("Data processing failed")
+
+def _create_csv(working_dir: str) -> str:
+    """Create CSV step."""
+    exporter = _get_processors()[2]
+    exporter.reset(working_dir)
+    if not exporter.combine_to_csv():
+        raise Exception("CSV creation failed")
+    
+    csv_path = os.path.join(working_dir, "combined_data.csv")
+    if not os.path.exists(csv_path):
+        raise Exception("CSV file not created")
+    
+    return csv_path
+
+def run_pipeline(working_dir: str, pdf_path: str, pdf_filename: str) -> str:
+    """Run the CPU-bound pipeline steps for one job; returns the CSV path.
+    
+    Module-level so it can be pickled into the microservice's PipelinePool.
+    """
+    # Step 1: Process PDF
+    _process_pdf(working_dir, pdf_path, pdf_filename)
+    
+    # Step 2: Process data
+    _process_data(working_dir)
+    
+    # Step 3: Create CSV
+    return _create_csv(working_dir)
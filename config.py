@@ -1,5 +1,6 @@
 import os
 import platform
+import tempfile
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
@@ -24,8 +25,19 @@ ALLOWED_EXTENSIONS = {'pdf'}
 
 # Processing Configuration
 TEMP_DIR = os.getenv('TEMP_DIR', '/tmp')
+# Scratch space for uploads and per-request working dirs (tmpfs when available)
+BOL_TMP_DIR = os.getenv('BOL_TMP_DIR') or ('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+# Processed results cached by input hash; BOL_CACHE_TTL=0 disables the cache
+BOL_CACHE_DIR = os.getenv('BOL_CACHE_DIR', os.path.join(TEMP_DIR, 'bol_cache'))
+BOL_CACHE_TTL = int(os.getenv('BOL_CACHE_TTL', '86400'))  # 24 hours
+# Part of every result cache key; bump it whenever extraction or CSV output changes
+RESULT_FORMAT_VERSION = 1
 
 # API Configuration
+# Concurrent /process requests admitted per worker process (others get 503)
+BOL_MAX_CONCURRENT = int(os.getenv('BOL_MAX_CONCURRENT', str(max(1, (os.cpu_count() or 2) // 2))))
+# Processes extracting pages of long PDFs (core_processors), per worker process
+BOL_PAGE_WORKERS = int(os.getenv('BOL_PAGE_WORKERS', str(BOL_MAX_CONCURRENT)))
 MAX_FILE_SIZE_MB = 100
 MAX_CONTENT_LENGTH = MAX_FILE_SIZE_MB * 1024 * 1024
 
@@ -8,15 +8,185 @@ optimized for API use without complex dependencies.
 
 import os
 import re
+import atexit
+import logging
 import csv
 import gc
-import glob
+import hashlib
 import tempfile
+import threading
+import multiprocessing
+from collections import OrderedDict
 from io import StringIO
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
 import pdfplumber
 
+from config import BOL_PAGE_WORKERS
+from csv_exporter import append_frame_rows, concat_frames, merge_csv_files, read_excel_frame
+
+# Per-page and per-file progress goes to DEBUG; the summary lines are still printed
+logger = logging.getLogger(__name__)
+
+try:
+    import pypdfium2 as pdfium  # much faster text extraction than pdfminer
+except ImportError:  # pdfplumber is used instead
+    pdfium = None
+
+# Patterns used per line of every page, compiled once
+# On a stripped line: at least three whitespace-separated tokens, and a token
+# starting with a digit; the same tests as on line.split() without the list
+_RE_THREE_TOKENS = re.compile(r'\s\S+\s')
+_RE_TOKEN_DIGIT = re.compile(r'(?:^|\s)\d')
+# A line starting with a digit or containing three separate digit runs; one
+# search instead of a match plus a findall over the line
+_RE_ROW_HINT = re.compile(r'^\d|\d\D+\d+\D+\d')
+# Table row candidates: whole lines containing at least one digit
+_RE_DIGIT_LINE = re.compile(r'^[^\d\n]*\d.*$', re.MULTILINE)
+# Line breaks str.splitlines() knows besides '\n'; pages with one are split per line
+_RE_OTHER_LINE_BREAK = re.compile('[\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]')
+_RE_STYLE1 = re.compile(r'\b[A-Z]+\d+\b')
+_RE_STYLE2 = re.compile(r'\b\d+[A-Z]+\b')
+_RE_CUBE = re.compile(r'\b\d{1,3}\.\d{2}\b')
+_RE_SHIPPING = re.compile(r'SHIPPING INSTRUCTIONS:', re.IGNORECASE)
+
+# The BILL OF LADING number is looked for in this many leading lines of a page
+INVOICE_HEADER_LINES = 10
+# Anchored at the page start: skips as few whole lines as possible (at most
+# INVOICE_HEADER_LINES - 1), then takes the leftmost match within one line
+_RE_INVOICE = re.compile(
+    r'\A(?:[^\n]*\n){0,%d}?[^\n]*?BILL OF LADING[^\S\n]+([A-Z]\d+)' % (INVOICE_HEADER_LINES - 1),
+    re.IGNORECASE
+)
+
+# Columns of the per-invoice CSVs
+INVOICE_CSV_HEADER = [
+    "Invoice No.", "Style", "Cartons", "Individual Pieces",
+    "BOL Cube", "Ship To Name", "Order Date", "Purchase Order No.",
+    "Start Date", "Cancel Date", "Pallet", "Burlington Cube", "Final Cube"
+]
+_INVOICE_CSV_HEADER_BYTES = (','.join(INVOICE_CSV_HEADER) + '\n').encode('utf-8')
+
+# Extraction allocates lots of short-lived, acyclic objects; rarer collections
+# of the older generations avoid repeated full heap walks. The thresholds are
+# interpreter-wide, so they are set once here, and only over the defaults.
+GC_THRESHOLDS = (700, 100, 10_000)
+if gc.get_threshold() == (700, 10, 10):
+    gc.set_threshold(*GC_THRESHOLDS)
+
+# PDFs with at least this many pages are extracted by several processes
+PARALLEL_MIN_PAGES = 8
+PAGES_PER_TASK = 10
+
+# Page extraction processes per worker process, see config.BOL_PAGE_WORKERS
+PAGE_WORKERS = max(1, BOL_PAGE_WORKERS)
+
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all extractions, created on first use.
+    
+    First use is usually on a request thread, so the processes come from a
+    fork server (preloading only this module) instead of being forked from
+    the multi-threaded server process.
+    """
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload([__name__])
+            else:
+                context = multiprocessing.get_context('spawn')
+            _page_pool = ProcessPoolExecutor(max_workers=PAGE_WORKERS, mp_context=context)
+            atexit.register(_page_pool.shutdown)
+        return _page_pool
+
+def _discard_page_pool(pool: ProcessPoolExecutor):
+    """Drop ``pool`` after one of its processes died; the next use builds a new one."""
+    global _page_pool
+    with _page_pool_lock:
+        # Another extraction may already have replaced it
+        if _page_pool is pool:
+            _page_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _save_page_text(working_dir: str, i: int, text: Optional[str]):
+    """Write the text of page ``i`` (0-based) to ``<i+1>.txt``."""
+    if not text or text.strip() == "":
+        text = f"[Page {i+1} - No text content found]"
+    
+    text_path = os.path.join(working_dir, f"{i+1}.txt")
+    with open(text_path, 'w', encoding='utf-8') as text_file:
+        text_file.write(text)
+    
+    logger.debug(f"Saved text from page {i+1}")
+
+def _extract_pdfium_pages(pdf, working_dir: str, start: int, stop: int):
+    """Save the text of pages ``start``..``stop - 1`` of an open PdfDocument."""
+    for i in range(start, stop):
+        try:
+            page = pdf[i]
+            try:
+                textpage = page.get_textpage()
+                try:
+                    # PDFium separates lines with CRLF; keep the TXT files LF like pdfplumber's
+                    text = textpage.get_text_range().replace('\r\n', '\n')
+                finally:
+                    textpage.close()
+            finally:
+                page.close()
+            
+            _save_page_text(working_dir, i, text)
+            
+        except Exception as page_error:
+            logger.warning(f"Error processing page {i+1}: {str(page_error)}")
+            continue
+
+def _extract_pdfium_page_range(pdf_path: str, working_dir: str, start: int, stop: int):
+    """Page pool task: open the PDF in this process and extract a page range."""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        _extract_pdfium_pages(pdf, working_dir, start, stop)
+    finally:
+        pdf.close()
+
+# Chunk size for raw byte copies between CSV files
+COPY_BUFFER_SIZE = 1024 * 1024
+
+def _copy_lines(source, target) -> int:
+    """Copy the rest of binary file ``source`` to ``target``; returns the line count.
+    
+    A missing newline at the end of ``source`` is added.
+    """
+    lines = 0
+    last = b''
+    while True:
+        chunk = source.read(COPY_BUFFER_SIZE)
+        if not chunk:
+            break
+        target.write(chunk)
+        lines += chunk.count(b'\n')
+        last = chunk[-1:]
+    if last and last != b'\n':
+        target.write(b'\n')
+        lines += 1
+    return lines
+
+def _format_csv_row(fields: List[str]) -> str:
+    """Format one CSV line the way ``csv.writer`` does with ``lineterminator='\\n'``.
+    
+    Row fields come from ``str.split()``, so they never contain whitespace;
+    only commas and quotes need quoting.
+    """
+    return ','.join(
+        '"' + field.replace('"', '""') + '"' if ',' in field or '"' in field else field
+        for field in fields
+    ) + '\n'
+
 class SimplePDFProcessor:
     """Simplified PDF processor for API use."""
     
@@ -26,36 +196,10 @@ class SimplePDFProcessor:
     def process_pdf(self, pdf_path: str) -> bool:
         """Extract text from PDF and save as numbered TXT files."""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                if not pdf.pages:
-                    raise Exception("PDF has no pages")
-                
-                page_count = len(pdf.pages)
-                print(f"📄 Processing {page_count} pages")
-                
-                for i, page in enumerate(pdf.pages):
-                    try:
-                        text = page.extract_text()
-                        
-                        if not text or text.strip() == "":
-                            text = f"[Page {i+1} - No text content found]"
-                        
-                        text_path = os.path.join(self.working_dir, f"{i+1}.txt")
-                        with open(text_path, 'w', encoding='utf-8') as text_file:
-                            text_file.write(text)
-                        
-                        print(f"✅ Saved text from page {i+1}")
-                        
-                        # Memory management
-                        if hasattr(page, 'flush_cache'):
-                            page.flush_cache()
-                        
-                        if i % 5 == 0:
-                            gc.collect()
-                            
-                    except Exception as page_error:
-                        print(f"⚠️ Error processing page {i+1}: {str(page_error)}")
-                        continue
+            if pdfium is not None:
+                page_count = self._extract_with_pdfium(pdf_path)
+            else:
+                page_count = self._extract_with_pdfplumber(pdf_path)
             
             print(f"✅ Text extraction completed for {page_count} pages")
             return True
@@ -63,40 +207,130 @@ class SimplePDFProcessor:
         except Exception as e:
             print(f"❌ Error extracting text from PDF: {str(e)}")
             return False
-
+    
+    def _extract_with_pdfium(self, pdf_path: str) -> int:
+        """Extract page texts with PDFium; returns the page count.
+        
+        Long documents are split into page ranges extracted in parallel by
+        the shared page pool; pages are independent, so only the TXT file
+        names tie them together.
+        """
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            page_count = len(pdf)
+            if not page_count:
+                raise Exception("PDF has no pages")
+            
+            print(f"📄 Processing {page_count} pages")
+            
+            workers = PAGE_WORKERS
+            if page_count < PARALLEL_MIN_PAGES or workers < 2:
+                _extract_pdfium_pages(pdf, self.working_dir, 0, page_count)
+                return page_count
+        finally:
+            pdf.close()
+        
+        # At most PAGES_PER_TASK pages per task keeps each worker's memory bounded
+        step = min(PAGES_PER_TASK, -(-page_count // workers))
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        try:
+            self._run_page_ranges(_get_page_pool(), pdf_path, ranges)
+        except BrokenProcessPool as e:
+            # A page process died (OOM kill, crash inside PDFium); retry once on a new pool
+            logger.warning(f"Page pool broken, retrying on a new pool: {str(e)}")
+            self._run_page_ranges(_get_page_pool(), pdf_path, ranges)
+        
+        return page_count
+    
+    def _run_page_ranges(self, pool: ProcessPoolExecutor, pdf_path: str,
+                         ranges: List[Tuple[int, int]]):
+        """Extract the page ranges on ``pool`` and wait for all of them.
+        
+        On the first failure the remaining tasks are cancelled and the running
+        ones waited for, so no page file is written into the working dir after
+        this returns. A broken pool is discarded before re-raising.
+        """
+        futures = []
+        try:
+            for start, stop in ranges:
+                futures.append(pool.submit(_extract_pdfium_page_range, pdf_path,
+                                           self.working_dir, start, stop))
+            for future in as_completed(futures):
+                future.result()
+        except BrokenProcessPool:
+            _discard_page_pool(pool)
+            raise
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            raise
+    
+    def _extract_with_pdfplumber(self, pdf_path: str) -> int:
+        """Extract page texts with pdfplumber; returns the page count."""
+        with pdfplumber.open(pdf_path) as pdf:
+            if not pdf.pages:
+                raise Exception("PDF has no pages")
+            
+            page_count = len(pdf.pages)
+            print(f"📄 Processing {page_count} pages")
+            
+            for i, page in enumerate(pdf.pages):
+                try:
+                    _save_page_text(self.working_dir, i, page.extract_text())
+                    
+                    # Release the page's parsed objects right away
+                    if hasattr(page, 'close'):
+                        page.close()
+                    elif hasattr(page, 'flush_cache'):
+                        page.flush_cache()
+                        
+                except Exception as page_error:
+                    logger.warning(f"Error processing page {i+1}: {str(page_error)}")
+                    continue
+        
+        return page_count
+    
 class SimpleDataProcessor:
     """Simplified data processor for API use."""
     
-    def __init__(self, working_dir: str):
+    def __init__(self, working_dir: str, cleanup: bool = True):
         self.working_dir = working_dir
-        self.invoice_data = {}
+        # Remove the TXT files once processed; not needed when the whole
+        # working dir is a temporary directory
+        self.cleanup = cleanup
+        # Open per-invoice CSVs, filled page by page as the TXT files are read
+        self._writers: Dict[str, Dict[str, Any]] = {}
     
     def process_all_files(self) -> bool:
         """Process all TXT files in the working directory."""
         try:
-            txt_files = [f for f in os.listdir(self.working_dir) if f.endswith('.txt')]
+            # One directory pass; DirEntry carries the file type, no extra stat
+            with os.scandir(self.working_dir) as entries:
+                txt_files = [e.name for e in entries if e.name.endswith('.txt') and e.is_file()]
             if not txt_files:
                 print("No TXT files found")
                 return False
             
             print(f"Found {len(txt_files)} TXT files to process")
             
-            # Phase 1: Collect data from all files
-            for txt_file in txt_files:
-                self._collect_invoice_data(txt_file)
-            
-            # Phase 2: Process collected data
-            for invoice_no, data in self.invoice_data.items():
-                self._process_invoice_data(invoice_no, data)
+            # Rows go straight to the invoice CSVs; nothing is kept per page
+            try:
+                for txt_file in txt_files:
+                    self._collect_invoice_data(txt_file)
+            finally:
+                for invoice_no in list(self._writers):
+                    self._close_invoice(invoice_no)
             
-            # Phase 3: Cleanup TXT files
-            for txt_file in txt_files:
-                file_path = os.path.join(self.working_dir, txt_file)
-                try:
-                    os.remove(file_path)
-                    print(f"Cleaned up {txt_file}")
-                except Exception as e:
-                    print(f"Warning: Could not remove {txt_file}: {str(e)}")
+            # Cleanup TXT files
+            if self.cleanup:
+                for txt_file in txt_files:
+                    file_path = os.path.join(self.working_dir, txt_file)
+                    try:
+                        os.remove(file_path)
+                        logger.debug(f"Cleaned up {txt_file}")
+                    except Exception as e:
+                        logger.warning(f"Could not remove {txt_file}: {str(e)}")
             
             return True
             
@@ -105,7 +339,7 @@ class SimpleDataProcessor:
             return False
     
     def _collect_invoice_data(self, txt_file: str):
-        """Collect data from a single TXT file."""
+        """Collect data from a single TXT file and append its rows to the invoice CSV."""
         file_path = os.path.join(self.working_dir, txt_file)
         
         try:
@@ -114,87 +348,75 @@ class SimpleDataProcessor:
             
             invoice_no = self._get_invoice_no(content)
             if not invoice_no:
-                print(f"Invoice number not found in {txt_file}")
+                logger.debug(f"Invoice number not found in {txt_file}")
                 return
             
-            # Initialize invoice data if not exists
-            if invoice_no not in self.invoice_data:
-                self.invoice_data[invoice_no] = {
-                    'pages': [],
-                    'has_totals': False
+            # Split once; the helpers below work on the same lines
+            lines = content.splitlines()
+            
+            # One lookup for pages of an invoice already seen
+            inv = self._writers.get(invoice_no)
+            if inv is None:
+                inv = self._writers[invoice_no] = {
+                    'file': None,
+                    'rows': 0,
+                    'bol_cube': '',
+                    'needs_cube': False
                 }
             
             # Extract table data
-            table_data = self._extract_table_data(content)
-            bol_cube = self._extract_bol_cube(content)
+            rows = self._extract_table_data(content, lines)
+            bol_cube = self._extract_bol_cube(lines)
             
-            page_data = {
-                'rows': table_data['rows'],
-                'has_totals': table_data['has_totals'],
-                'totals': table_data['totals'],
-                'bol_cube': bol_cube
-            }
+            # The cube of the last page that has one is used for the whole invoice
+            if bol_cube:
+                inv['bol_cube'] = bol_cube
             
-            self.invoice_data[invoice_no]['pages'].append(page_data)
+            self._write_rows(invoice_no, inv, rows)
             
-            if table_data['has_totals']:
-                self.invoice_data[invoice_no]['has_totals'] = True
-            
-            print(f"Collected data from {txt_file}: {len(table_data['rows'])} rows")
+            logger.debug(f"Collected data from {txt_file}: {len(rows)} rows")
             
         except Exception as e:
-            print(f"Error collecting data from {txt_file}: {str(e)}")
+            logger.warning(f"Error collecting data from {txt_file}: {str(e)}")
     
-    def _extract_table_data(self, content: str) -> Dict[str, Any]:
-        """Extract table data from content."""
-        lines = content.splitlines()
+    def _extract_table_data(self, content: str, lines: List[str]) -> List[List[str]]:
+        """Extract the table rows from content and its lines."""
         rows = []
-        totals = {'pieces': '', 'weight': ''}
-        has_totals = False
         
-        for line in lines:
+        if _RE_OTHER_LINE_BREAK.search(content):
+            candidates = lines
+        else:
+            # Every row test needs a digit; lines without one are skipped by
+            # the regex engine instead of being classified one by one
+            candidates = (match.group() for match in _RE_DIGIT_LINE.finditer(content))
+        
+        for line in candidates:
             line_stripped = line.strip()
             
-            # Check for totals
-            if "TOTAL CARTONS" in line.upper():
-                has_totals = True
-                # Extract totals from this line or subsequent lines
-                numbers = re.findall(r'\d+(?:,\d{3})*(?:\.\d+)?', line)
-                if len(numbers) >= 2:
-                    totals['pieces'] = numbers[-2].replace(',', '')
-                    totals['weight'] = numbers[-1].replace(',', '')
-            
             # Check for table rows
             if self._is_valid_table_row(line_stripped):
                 row_data = self._parse_table_row(line_stripped)
                 if row_data:
                     rows.append(row_data)
         
-        return {
-            'rows': rows,
-            'has_totals': has_totals,
-            'totals': totals
-        }
+        return rows
     
     def _is_valid_table_row(self, line: str) -> bool:
         """Check if line is a valid table row."""
         if not line or len(line) < 10:
             return False
         
-        # Look for patterns that indicate this is a data row
-        if re.match(r'^\d+', line):
+        # Starts with a number or contains multiple numeric values
+        if line[0].isdecimal() or _RE_ROW_HINT.search(line):
             return True
         
-        # Contains multiple numeric values
-        numbers = re.findall(r'\d+', line)
-        if len(numbers) >= 3:
-            return True
+        # Style rows need three tokens; most other lines fail this cheap check
+        if not _RE_THREE_TOKENS.search(line):
+            return False
         
         # Contains style patterns
-        if re.search(r'\b[A-Z]+\d+\b', line) or re.search(r'\b\d+[A-Z]+\b', line):
-            tokens = line.split()
-            if len(tokens) >= 3 and any(re.match(r'^\d+', token) for token in tokens):
-                return True
+        if _RE_STYLE1.search(line) or _RE_STYLE2.search(line):
+            return _RE_TOKEN_DIGIT.search(line) is not None
         
         return False
     
@@ -209,15 +431,14 @@ class SimpleDataProcessor:
             pass
         return None
     
-    def _extract_bol_cube(self, content: str) -> str:
-        """Extract BOL Cube from content."""
-        lines = content.splitlines()
+    def _extract_bol_cube(self, lines: List[str]) -> str:
+        """Extract BOL Cube from the lines of a page."""
         for i, line in enumerate(lines):
-            if "SHIPPING INSTRUCTIONS:" in line.upper():
+            if _RE_SHIPPING.search(line):
                 j = i - 1
                 while j >= 0:
                     candidate = lines[j].strip()
-                    match = re.search(r'\b\d{1,3}\.\d{2}\b', candidate)
+                    match = _RE_CUBE.search(candidate)
                     if match:
                         return match.group(0)
                     j -= 1
@@ -225,75 +446,85 @@ class SimpleDataProcessor:
         return ""
     
     def _get_invoice_no(self, content: str) -> str:
-        """Extract invoice number from content."""
-        lines = content.splitlines()
-        for line in lines[:10]:
-            if "BILL OF LADING" in line.upper():
-                match = re.search(r'BILL OF LADING\s+([A-Z]\d+)', line, re.IGNORECASE)
-                if match:
-                    return match.group(1)
-        return ""
+        """Extract invoice number from the first lines of content."""
+        # One precompiled match over the header lines, no splitting or slicing
+        match = _RE_INVOICE.match(content)
+        return match.group(1) if match else ""
     
-    def _process_invoice_data(self, invoice_no: str, data: Dict[str, Any]):
-        """Process collected invoice data and create CSV."""
-        print(f"Processing Invoice {invoice_no}")
+    def _write_rows(self, invoice_no: str, inv: Dict[str, Any], rows: List[List[str]]):
+        """Append table rows to the invoice's CSV, creating it on the first row."""
+        if not rows:
+            return
+        
+        if inv['file'] is None:
+            csv_path = os.path.join(self.working_dir, f"{invoice_no}.csv")
+            inv['file'] = open(csv_path, 'wb')
+            inv['file'].write(_INVOICE_CSV_HEADER_BYTES)
         
-        # Collect all rows from all pages
-        all_rows = []
-        bol_cube = ""
+        # Take the first 12 columns and pad to the header length in one step
+        width = len(INVOICE_CSV_HEADER) - 1
+        csv_rows = [
+            [invoice_no] + row[:width] + [""] * (width - len(row))
+            for row in rows if isinstance(row, list) and len(row) >= 3
+        ]
         
-        for page in data['pages']:
-            all_rows.extend(page['rows'])
-            if page['bol_cube']:
-                bol_cube = page['bol_cube']
+        # BOL Cube is filled in when the invoice is closed
+        if not inv['needs_cube'] and any(csv_row[4] == "" for csv_row in csv_rows):
+            inv['needs_cube'] = True
         
-        if not all_rows:
-            print(f"No rows found for invoice {invoice_no}")
+        # One encode and one write per page instead of a writerow() per row
+        inv['file'].write(''.join(map(_format_csv_row, csv_rows)).encode('utf-8'))
+        
+        inv['rows'] += len(rows)
+    
+    def _close_invoice(self, invoice_no: str):
+        """Close the invoice's CSV and fill in the BOL Cube of rows without one."""
+        inv = self._writers.pop(invoice_no)
+        logger.debug(f"Processing Invoice {invoice_no}")
+        
+        if inv['file'] is None:
+            logger.debug(f"No rows found for invoice {invoice_no}")
             return
         
-        # Create CSV for this invoice
-        csv_path = os.path.join(self.working_dir, f"{invoice_no}.csv")
+        inv['file'].close()
         
-        # Simple CSV creation - can be enhanced with proper column mapping
-        with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            # Write header
-            header = [
-                "Invoice No.", "Style", "Cartons", "Individual Pieces", 
-                "BOL Cube", "Ship To Name", "Order Date", "Purchase Order No.",
-                "Start Date", "Cancel Date", "Pallet", "Burlington Cube", "Final Cube"
-            ]
-            writer.writerow(header)
-            
-            # Write data rows (simplified mapping)
-            for row in all_rows:
-                if isinstance(row, list) and len(row) >= 3:
-                    csv_row = [invoice_no] + row[:12]  # Take first 12 columns
-                    # Pad to match header length
-                    while len(csv_row) < len(header):
-                        csv_row.append("")
-                    
-                    # Set BOL Cube on first row
-                    if bol_cube and csv_row[4] == "":
-                        csv_row[4] = bol_cube
-                    
-                    writer.writerow(csv_row)
+        # The cube may only show up on a later page than the rows needing it,
+        # so those rows are patched in one streaming pass over this invoice's CSV
+        if inv['needs_cube'] and inv['bol_cube']:
+            csv_path = inv['file'].name
+            patched_path = csv_path + '.tmp'
+            with open(csv_path, 'r', newline='', encoding='utf-8') as src, \
+                    open(patched_path, 'wb') as dst:
+                dst.write(src.readline().encode('utf-8'))  # header
+                lines = []
+                for csv_row in csv.reader(src):
+                    if csv_row[4] == "":
+                        csv_row[4] = inv['bol_cube']
+                    lines.append(_format_csv_row(csv_row))
+                dst.write(''.join(lines).encode('utf-8'))
+            os.replace(patched_path, csv_path)
         
-        print(f"Created CSV for {invoice_no}: {len(all_rows)} rows")
+        logger.debug(f"Created CSV for {invoice_no}: {inv['rows']} rows")
 
 class SimpleCSVExporter:
     """Simplified CSV exporter for API use."""
     
-    def __init__(self, working_dir: str):
+    def __init__(self, working_dir: str, cleanup: bool = True):
         self.working_dir = working_dir
+        # Remove the per-invoice CSVs once combined
+        self.cleanup = cleanup
     
     def combine_to_csv(self, output_filename: str = "combined_data.csv") -> bool:
         """Combine all CSV files into one."""
         try:
-            csv_files = glob.glob(os.path.join(self.working_dir, "*.csv"))
-            # Exclude the output file if it already exists
-            csv_files = [f for f in csv_files if os.path.basename(f) != output_filename]
+            # One directory pass; skips the output file if it already exists and,
+            # like glob's "*.csv", hidden files
+            with os.scandir(self.working_dir) as entries:
+                csv_files = [
+                    e.path for e in entries
+                    if e.name.endswith('.csv') and e.name != output_filename
+                    and not e.name.startswith('.') and e.is_file()
+                ]
             
             if not csv_files:
                 print("No CSV files found to combine")
@@ -302,48 +533,133 @@ class SimpleCSVExporter:
             print(f"Found {len(csv_files)} CSV files to combine")
             
             output_path = os.path.join(self.working_dir, output_filename)
-            combined_dfs = []
             
+            # The per-invoice CSVs all come from SimpleDataProcessor with the
+            # same header, so their rows can be concatenated as raw bytes
+            headers = set()
             for csv_file in csv_files:
-                try:
-                    df = pd.read_csv(csv_file, dtype=str)
-                    combined_dfs.append(df)
-                    
-                    # Clean up individual CSV
-                    os.remove(csv_file)
-                    print(f"Processed and removed {os.path.basename(csv_file)}")
-                    
-                except Exception as e:
-                    print(f"Error processing {csv_file}: {str(e)}")
-                    continue
+                with open(csv_file, 'rb') as f:
+                    headers.add(f.readline().rstrip(b'\r\n'))
+            if len(headers) != 1:
+                return self._combine_with_pandas(csv_files, output_path, output_filename)
             
-            if combined_dfs:
-                # Combine all DataFrames
-                final_df = pd.concat(combined_dfs, ignore_index=True)
-                
-                # Save combined result
-                final_df.to_csv(output_path, index=False)
+            total_rows = 0
+            with open(output_path, 'wb') as out:
+                out.write(headers.pop() + b'\n')
                 
-                print(f"Successfully combined {len(csv_files)} files into {output_filename}")
-                print(f"Total rows: {len(final_df)}")
-                
-                return True
-            else:
-                print("No valid CSV data found")
-                return False
+                for csv_file in csv_files:
+                    try:
+                        with open(csv_file, 'rb') as f:
+                            f.readline()  # header
+                            total_rows += _copy_lines(f, out)
+                        
+                        # Clean up individual CSV
+                        if self.cleanup:
+                            os.remove(csv_file)
+                            logger.debug(f"Processed and removed {os.path.basename(csv_file)}")
+                        
+                    except Exception as e:
+                        logger.warning(f"Error processing {csv_file}: {str(e)}")
+                        continue
+            
+            print(f"Successfully combined {len(csv_files)} files into {output_filename}")
+            print(f"Total rows: {total_rows}")
+            
+            return True
                 
         except Exception as e:
             print(f"Error combining CSV files: {str(e)}")
             return False
+    
+    def _combine_with_pandas(self, csv_files: List[str], output_path: str,
+                             output_filename: str) -> bool:
+        """Combine CSVs whose headers differ, aligning columns by name."""
+        combined_dfs = []
+        
+        for csv_file in csv_files:
+            try:
+                df = pd.read_csv(csv_file, dtype=str)
+                combined_dfs.append(df)
+                
+                # Clean up individual CSV
+                if self.cleanup:
+                    os.remove(csv_file)
+                    logger.debug(f"Processed and removed {os.path.basename(csv_file)}")
+                
+            except Exception as e:
+                logger.warning(f"Error processing {csv_file}: {str(e)}")
+                continue
+        
+        if combined_dfs:
+            # Combine all DataFrames
+            final_df = pd.concat(combined_dfs, ignore_index=True)
+            
+            # Save combined result
+            final_df.to_csv(output_path, index=False)
+            
+            print(f"Successfully combined {len(csv_files)} files into {output_filename}")
+            print(f"Total rows: {len(final_df)}")
+            
+            return True
+        else:
+            print("No valid CSV data found")
+            return False
 
 class SimpleBOLProcessor:
     """Complete BOL processing pipeline."""
     
+    # Results of recent calls, keyed by a hash of the inputs, in LRU order;
+    # retries and re-uploads of the same files skip the whole pipeline.
+    # Bounded by total size, as every server worker process holds its own copy;
+    # results above RESULT_CACHE_MAX_ITEM_BYTES are not cached at all
+    RESULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+    RESULT_CACHE_MAX_ITEM_BYTES = 4 * 1024 * 1024
+    _result_cache: "OrderedDict[bytes, bytes]" = OrderedDict()
+    _result_cache_bytes = 0
+    _result_cache_lock = threading.Lock()
+    
+    @classmethod
+    def process_bol(cls, pdf_content: bytes, pdf_filename: str, 
+                    csv_content: Optional[bytes] = None, 
+                    csv_filename: Optional[str] = None) -> bytes:
+        """Process BOL PDF and optional CSV, return final CSV content.
+        
+        Identical inputs are served from an in-process LRU cache of at most
+        RESULT_CACHE_MAX_BYTES.
+        """
+        hasher = hashlib.blake2b(pdf_content, digest_size=16)
+        if csv_content and csv_filename:
+            # The extension decides whether the extra file is parsed as CSV or Excel
+            hasher.update(b'\0' + os.path.splitext(csv_filename)[1].lower().encode('utf-8') + b'\0')
+            hasher.update(csv_content)
+        key = hasher.digest()
+        
+        with cls._result_cache_lock:
+            result = cls._result_cache.get(key)
+            if result is not None:
+                cls._result_cache.move_to_end(key)
+                return result
+        
+        result = cls._process_bol(pdf_content, pdf_filename, csv_content, csv_filename)
+        if len(result) > cls.RESULT_CACHE_MAX_ITEM_BYTES:
+            return result
+        
+        with cls._result_cache_lock:
+            previous = cls._result_cache.pop(key, None)
+            if previous is not None:
+                cls._result_cache_bytes -= len(previous)
+            cls._result_cache[key] = result
+            cls._result_cache_bytes += len(result)
+            while cls._result_cache_bytes > cls.RESULT_CACHE_MAX_BYTES:
+                _, evicted = cls._result_cache.popitem(last=False)
+                cls._result_cache_bytes -= len(evicted)
+        return result
+    
     @staticmethod
-    def process_bol(pdf_content: bytes, pdf_filename: str, 
-                   csv_content: Optional[bytes] = None, 
-                   csv_filename: Optional[str] = None) -> bytes:
-        """Process BOL PDF and optional CSV, return final CSV content."""
+    def _process_bol(pdf_content: bytes, pdf_filename: str,
+                     csv_content: Optional[bytes] = None,
+                     csv_filename: Optional[str] = None) -> bytes:
+        """Run the full pipeline for one set of inputs."""
         
         with tempfile.TemporaryDirectory() as temp_dir:
             try:
@@ -357,12 +673,13 @@ class SimpleBOLProcessor:
                     raise Exception("PDF processing failed")
                 
                 # Step 2: Process extracted text
-                data_processor = SimpleDataProcessor(temp_dir)
+                # The temporary directory removes the intermediate files on exit
+                data_processor = SimpleDataProcessor(temp_dir, cleanup=False)
                 if not data_processor.process_all_files():
                     raise Exception("Data processing failed")
                 
                 # Step 3: Create CSV
-                csv_exporter = SimpleCSVExporter(temp_dir)
+                csv_exporter = SimpleCSVExporter(temp_dir, cleanup=False)
                 if not csv_exporter.combine_to_csv():
                     raise Exception("CSV creation failed")
                 
@@ -375,17 +692,16 @@ class SimpleBOLProcessor:
                     with open(additional_csv_path, 'wb') as f:
                         f.write(csv_content)
                     
-                    # Simple merge
-                    base_df = pd.read_csv(final_csv_path, dtype=str)
-                    
                     if csv_filename.lower().endswith('.csv'):
-                        additional_df = pd.read_csv(additional_csv_path, dtype=str)
+                        # Same header: raw byte append; otherwise pyarrow (when installed) or pandas
+                        merge_csv_files(final_csv_path, additional_csv_path)
                     else:
-                        additional_df = pd.read_excel(additional_csv_path, dtype=str)
-                    
-                    # Basic concatenation merge
-                    merged_df = pd.concat([base_df, additional_df], ignore_index=True)
-                    merged_df.to_csv(final_csv_path, index=False)
+                        additional_df = read_excel_frame(additional_csv_path, csv_filename)
+                        
+                        # Same columns: append the sheet's rows, the base CSV is not reread
+                        if append_frame_rows(final_csv_path, additional_df) is None:
+                            base_df = pd.read_csv(final_csv_path, dtype=str)
+                            concat_frames([base_df, additional_df]).to_csv(final_csv_path, index=False)
                 
                 # Step 5: Return final CSV content
                 with open(final_csv_path, 'rb') as f:
@@ -1,20 +1,222 @@
 import os
 import gc
+import io
+import csv
 import glob
+import codecs
+import shutil
+import numpy as np
 import pandas as pd
 from config import OUTPUT_CSV_NAME
 
+# Read size for raw byte copies in append_csv_rows
+COPY_BUFFER_SIZE = 1024 * 1024
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow is optional; merges fall back to pandas
+    pa = None
+    pacsv = None
+
+try:
+    import python_calamine  # noqa: F401  (Rust Excel reader used by pandas' 'calamine' engine)
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+def concat_frames(frames):
+    """Stack DataFrames row-wise into one frame with the union of their columns.
+
+    Equivalent to ``pd.concat(frames, ignore_index=True)`` for the string-typed
+    frames used here, but reindexes each frame once and stacks the values in a
+    single allocation instead of building every column separately.
+    """
+    columns = list(dict.fromkeys(col for df in frames for col in df.columns))
+    values = np.vstack([df.reindex(columns=columns).to_numpy(dtype=object) for df in frames])
+    return pd.DataFrame(values, columns=columns)
+
+def _read_string_table(path):
+    """Read a CSV with pyarrow, keeping every column as a string."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), [])
+    convert_options = pacsv.ConvertOptions(
+        column_types={name: pa.string() for name in header},
+        strings_can_be_null=True,
+    )
+    return pacsv.read_csv(path, convert_options=convert_options)
+
+def read_excel_frame(path, filename=None):
+    """Read the first sheet of an Excel file into an all-string DataFrame.
+
+    Uses the calamine engine when python-calamine is installed, otherwise
+    xlrd for legacy ``.xls`` files and pandas' default (openpyxl) for the rest.
+    """
+    if HAS_CALAMINE:
+        engine = 'calamine'
+    elif (filename or path).lower().endswith('.xls'):
+        engine = 'xlrd'
+    else:
+        engine = None
+    return pd.read_excel(path, dtype=str, engine=engine)
+
+def _write_string_table(table, path):
+    """Write a string table as CSV, byte for byte as ``DataFrame.to_csv`` would.
+
+    pyarrow writes the rows unquoted when no value needs quoting. Otherwise
+    (a value contains a delimiter, quote or line break) the table is written
+    by pandas: pyarrow's 'needed' style would quote every string value
+    instead of only those, as pandas' QUOTE_MINIMAL does. Single-column tables
+    also go to pandas, which writes an empty value there as ``""``.
+    """
+    # pyarrow's CSV writer emits garbage for empty chunks (e.g. from a base
+    # file with no rows); rebuilding from the non-empty batches copies nothing
+    table = pa.Table.from_batches([batch for batch in table.to_batches() if batch.num_rows],
+                                  schema=table.schema)
+
+    if table.num_columns > 1:
+        header = io.StringIO()
+        csv.writer(header, lineterminator='\n').writerow(table.column_names)
+        header = header.getvalue().encode('utf-8')
+
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.flush()
+            try:
+                pacsv.write_csv(table, f, pacsv.WriteOptions(include_header=False, quoting_style='none'))
+                return
+            except pa.ArrowInvalid:
+                pass
+
+    table.to_pandas().to_csv(path, index=False)
+
+def _count_lines(f):
+    """Count newline-terminated lines from the current position of a binary file."""
+    lines = 0
+    while True:
+        chunk = f.read(COPY_BUFFER_SIZE)
+        if not chunk:
+            return lines
+        lines += chunk.count(b'\n')
+
+def _parse_header(line):
+    """Parse a raw, LF-terminated header line; None if it cannot be used as-is."""
+    if line.startswith(codecs.BOM_UTF8):
+        line = line[len(codecs.BOM_UTF8):]
+    if not line.endswith(b'\n') or line.endswith(b'\r\n'):
+        return None
+    return next(csv.reader([line.decode('utf-8', 'replace')]), None)
+
+def append_csv_rows(base_path, additional_path, output_path=None):
+    """Append the data rows of ``additional_path`` to ``base_path`` without parsing them.
+
+    Only applies when both files start with the same LF-terminated header;
+    the remaining bytes are then copied as-is. Returns the row counts of
+    the two inputs, or None when the headers differ (nothing is written).
+    """
+    output_path = output_path or base_path
+
+    with open(base_path, 'rb') as base, open(additional_path, 'rb') as extra:
+        base_header = _parse_header(base.readline())
+        if base_header is None or base_header != _parse_header(extra.readline()):
+            return None
+        base_rows = _count_lines(base)
+
+        if output_path != base_path:
+            shutil.copyfile(base_path, output_path)
+
+        with open(output_path, 'r+b') as out:
+            # Make sure the appended rows start on a new line
+            out.seek(-1, os.SEEK_END)
+            missing_newline = out.read(1) != b'\n'
+            out.seek(0, os.SEEK_END)
+            if missing_newline:
+                out.write(b'\n')
+                base_rows += 1
+
+            extra_rows = 0
+            last = b''
+            while True:
+                chunk = extra.read(COPY_BUFFER_SIZE)
+                if not chunk:
+                    break
+                out.write(chunk)
+                extra_rows += chunk.count(b'\n')
+                last = chunk[-1:]
+            if last and last != b'\n':
+                out.write(b'\n')
+                extra_rows += 1
+
+    return base_rows, extra_rows
+
+def append_frame_rows(base_path, frame):
+    """Append the rows of ``frame`` to the CSV at ``base_path`` without rereading it.
+
+    Only applies when the frame's columns match the base file's LF-terminated
+    header exactly. Returns the number of rows appended, or None when the
+    columns differ (nothing is written).
+    """
+    with open(base_path, 'rb') as base:
+        base_header = _parse_header(base.readline())
+    if base_header is None or base_header != [str(col) for col in frame.columns]:
+        return None
+
+    with open(base_path, 'r+b') as out:
+        # Make sure the appended rows start on a new line
+        out.seek(-1, os.SEEK_END)
+        if out.read(1) != b'\n':
+            out.write(b'\n')
+    frame.to_csv(base_path, mode='a', header=False, index=False)
+    return len(frame)
+
+def merge_csv_files(base_path, additional_path, output_path=None):
+    """Append the rows of ``additional_path`` to ``base_path`` and write the result.
+
+    Columns are the union of both files, all values are kept as strings.
+    Files with identical headers are appended byte for byte; otherwise uses
+    pyarrow's multithreaded CSV reader/writer when installed and
+    pandas otherwise. Writes to ``output_path`` (default: ``base_path``)
+    and returns the row counts of the two inputs.
+    """
+    output_path = output_path or base_path
+
+    # Same columns in the same order: plain byte append, no parsing at all
+    row_counts = append_csv_rows(base_path, additional_path, output_path)
+    if row_counts is not None:
+        return row_counts
+
+    if pacsv is not None:
+        try:
+            base_table = _read_string_table(base_path)
+            additional_table = _read_string_table(additional_path)
+            merged = pa.concat_tables([base_table, additional_table], promote_options="default")
+            _write_string_table(merged, output_path)
+            return base_table.num_rows, additional_table.num_rows
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            # e.g. duplicate header names, which pandas deduplicates on read
+            print(f"pyarrow merge failed, falling back to pandas: {str(e)}")
+
+    base_df = pd.read_csv(base_path, dtype=str)
+    additional_df = pd.read_csv(additional_path, dtype=str)
+    concat_frames([base_df, additional_df]).to_csv(output_path, index=False)
+    return len(base_df), len(additional_df)
+
 class CSVExporter:
     def __init__(self, session_dir):
         """Initialize the CSV exporter with a session directory."""
         self.session_dir = session_dir
 
+    def reset(self, session_dir):
+        """Point the exporter at a new session directory."""
+        self.session_dir = session_dir
+
     def combine_to_csv(self):
         """Combine all CSV files in the session directory into one."""
         try:
             # Get all CSV files in the session directory except the output file
-            csv_files = [f for f in glob.glob(os.path.join(self.session_dir, "*.csv"))
-                        if os.path.basename(f) != OUTPUT_CSV_NAME]
+            # Sorted so the row order does not depend on the filesystem
+            csv_files = sorted(f for f in glob.glob(os.path.join(self.session_dir, "*.csv"))
+                               if os.path.basename(f) != OUTPUT_CSV_NAME)
 
             if not csv_files:
                 print("No CSV files found to combine")
@@ -48,7 +250,7 @@ class CSVExporter:
                     continue
 
                 # Combine chunks and write to output
-                chunk_df = pd.concat(dfs, ignore_index=True)
+                chunk_df = pd.concat(dfs, ignore_index=True, sort=False)
                 
                 if first_file:
                     # Write with header for first chunk
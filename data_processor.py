@@ -17,6 +17,11 @@ class DataProcessor:
         self.invoice_data = {}  # Store data for multi-page invoices
         self._setup_session_directory()
 
+    def reset(self, session_dir):
+        """Reuse this processor for another session directory, dropping per-job state."""
+        self.session_dir = session_dir
+        self.invoice_data = {}
+
     def _generate_session_id(self):
         """Generate a unique session ID using timestamp and UUID."""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+File Staging Helpers for the BOL Processing APIs
+================================================
+Shared helpers that move uploaded files onto disk without
+buffering whole request bodies in memory.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, IO, Iterable, Optional
+
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+from config import BOL_TMP_DIR
+
+# Read size used when pulling the request body off the socket; 1 MiB keeps
+# the pure-Python decoder loop to one pass per MiB of upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Buffer size for the user-space copy fallback in link_or_copy
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Upper bound for buffered (non-file) form fields, same default as Werkzeug
+MAX_FORM_MEMORY_SIZE = 500 * 1024
+
+def scratch_root(expected_size: Optional[int] = None) -> str:
+    """Return the directory to create scratch files and working dirs in.
+
+    Uses ``BOL_TMP_DIR`` (tmpfs by default) unless ``expected_size`` bytes
+    would take more than half of its free space, in which case the regular
+    disk-backed temp dir is used instead.
+    """
+    fallback = tempfile.gettempdir()
+    if not expected_size or BOL_TMP_DIR == fallback:
+        return BOL_TMP_DIR
+    try:
+        free = shutil.disk_usage(BOL_TMP_DIR).free
+    except OSError:
+        return fallback
+    return BOL_TMP_DIR if expected_size <= free // 2 else fallback
+
+@dataclass(slots=True)
+class UploadedFile:
+    """A multipart file part that was streamed to disk."""
+    path: str
+    filename: str
+    digest: str = ''  # blake2b of the content, hex
+
+@dataclass(slots=True)
+class StreamedUpload:
+    """Files and form fields parsed from a streamed multipart body."""
+    files: Dict[str, UploadedFile] = field(default_factory=dict)
+    form: Dict[str, str] = field(default_factory=dict)
+
+def upload_extension(filename: str) -> str:
+    """Return the lower-cased extension of a client filename, e.g. ``'.pdf'``.
+
+    Taken from the raw name rather than ``secure_filename``, which drops
+    non-ASCII characters and so turns ``'账单.pdf'`` into ``'pdf'``. Anything
+    but a plain ASCII alphanumeric extension gives ``''``.
+    """
+    _, dot, ext = (filename or '').rpartition('.')
+    ext = ext.lower()
+    return f".{ext}" if dot and ext.isascii() and ext.isalnum() else ''
+
+def stream_multipart_upload(stream: IO[bytes], content_type: Optional[str], upload_dir: str,
+                            file_fields: Iterable[str],
+                            chunk_size: int = UPLOAD_CHUNK_SIZE) -> StreamedUpload:
+    """Parse a multipart/form-data body chunk by chunk, writing file parts to disk.
+
+    Parts named in ``file_fields`` are written to ``upload_dir/<field><ext>``
+    as they arrive, so the body is never held in memory or spooled twice.
+    Each stored file is hashed with BLAKE2b on the way through
+    (``UploadedFile.digest``). Other file parts are discarded. Raises
+    ``ValueError`` if the body is not valid multipart/form-data or a
+    non-file field exceeds ``MAX_FORM_MEMORY_SIZE``.
+    """
+    mimetype, options = parse_options_header(content_type or '')
+    boundary = options.get('boundary')
+    if mimetype != 'multipart/form-data' or not boundary:
+        raise ValueError("Request must be multipart/form-data with a boundary")
+
+    wanted = set(file_fields)
+    # The decoder's own limit caps its whole input buffer, i.e. the read size;
+    # only buffered form fields need a bound here, so it is enforced below
+    decoder = MultipartDecoder(boundary.encode('latin-1'), None)
+    upload = StreamedUpload()
+    current_part = None
+    sink = None
+    hasher = None
+    field_chunks = []
+    field_size = 0
+
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            decoder.receive_data(chunk or None)
+
+            event = decoder.next_event()
+            while not isinstance(event, (Epilogue, NeedData)):
+                if isinstance(event, File):
+                    current_part = event
+                    if event.name in wanted and event.name not in upload.files:
+                        path = os.path.join(upload_dir, f"{event.name}{upload_extension(event.filename)}")
+                        sink = open(path, 'wb')
+                        hasher = hashlib.blake2b(digest_size=16)
+                        upload.files[event.name] = UploadedFile(path=path, filename=event.filename)
+                elif isinstance(event, Field):
+                    current_part = event
+                    field_chunks = []
+                    field_size = 0
+                elif isinstance(event, Data):
+                    if isinstance(current_part, File):
+                        if sink is not None:
+                            sink.write(event.data)
+                            hasher.update(event.data)
+                            if not event.more_data:
+                                sink.close()
+                                sink = None
+                                upload.files[current_part.name].digest = hasher.hexdigest()
+                    else:
+                        field_size += len(event.data)
+                        if field_size > MAX_FORM_MEMORY_SIZE:
+                            raise ValueError(f"Form field '{current_part.name}' is too large")
+                        field_chunks.append(event.data)
+                        if not event.more_data:
+                            upload.form[current_part.name] = b''.join(field_chunks).decode('utf-8', 'replace')
+                event = decoder.next_event()
+
+            if isinstance(event, Epilogue) or not chunk:
+                break
+    finally:
+        if sink is not None:
+            sink.close()
+
+    return upload
+
+def safe_unlink(path: Optional[str]) -> bool:
+    """Remove ``path`` if it exists; returns True when a file was removed.
+
+    One unlink call instead of an exists() check followed by unlink().
+    """
+    try:
+        os.unlink(path)
+        return True
+    except (FileNotFoundError, TypeError):
+        return False
+
+def link_or_copy(src: str, dst: str) -> None:
+    """Place ``src`` at ``dst`` as cheaply as possible.
+
+    Hardlinks when both paths share a filesystem (no bytes moved), otherwise
+    copies in kernel space with ``os.sendfile``, and finally falls back to a
+    buffered copy. File metadata is never copied.
+    """
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        if hasattr(os, 'sendfile'):
+            remaining = os.fstat(source.fileno()).st_size
+            offset = 0
+            try:
+                while remaining > 0:
+                    sent = os.sendfile(target.fileno(), source.fileno(), offset, remaining)
+                    if sent == 0:
+                        break
+                    offset += sent
+                    remaining -= sent
+                return
+            except OSError:
+                # Not supported for this pair of files; restart with a plain copy
+                source.seek(0)
+                target.seek(0)
+                target.truncate()
+        shutil.copyfileobj(source, target, COPY_BUFFER_SIZE)
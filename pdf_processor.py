@@ -24,6 +24,10 @@ class PDFProcessor:
             print("📄 PDF processing will use pdfplumber only (text extraction)")
             self.poppler_available = False
 
+    def reset(self, session_dir):
+        """Point the processor at a new session directory, keeping the Poppler probe result."""
+        self.session_dir = session_dir
+
     def process_first_pdf(self):
         """Process the first PDF found in the directory."""
         try:
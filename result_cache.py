@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Result Cache for the BOL Processing APIs
+========================================
+Disk cache of processed CSV outputs keyed by the content hash of the
+uploaded inputs, so re-uploads of the same PDF skip the whole pipeline.
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+from config import BOL_CACHE_DIR, BOL_CACHE_TTL, RESULT_FORMAT_VERSION
+from file_staging import link_or_copy, safe_unlink
+
+# How often put() sweeps expired entries out of the cache directory
+PRUNE_INTERVAL = 15 * 60
+
+# Age after which a leftover temp file (a crash between write and rename) is removed
+STALE_TMP_AGE = 60 * 60
+
+def cache_key(pdf_digest: str, csv_digest: Optional[str] = None, csv_ext: str = '') -> str:
+    """Build a cache key from the upload digests (see UploadedFile.digest).
+
+    Prefixed with RESULT_FORMAT_VERSION, so results of an older release are
+    never served after a deploy that changes the output.
+    """
+    key = f"v{RESULT_FORMAT_VERSION}-{pdf_digest}"
+    if not csv_digest:
+        return key
+    # The extension decides whether the extra file is parsed as CSV or Excel
+    return f"{key}-{csv_digest}{csv_ext.lower().replace('.', '_')}"
+
+class ResultCache:
+    """Processed CSVs stored as ``<root>/<key>.csv`` and expired by mtime.
+
+    Storing a result hardlinks it only when it is on the cache's filesystem;
+    with the defaults (results on BOL_TMP_DIR, cache under TEMP_DIR) it is a
+    kernel-space copy. Hits handed out with link_entry() are always links.
+    """
+
+    def __init__(self, root: str = BOL_CACHE_DIR, ttl: int = BOL_CACHE_TTL):
+        self.root = root
+        self.ttl = ttl
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.csv")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the path of a fresh cached result, or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+        if time.time() - mtime > self.ttl:
+            safe_unlink(path)
+            return None
+        return path
+
+    def link_entry(self, key: str) -> Optional[str]:
+        """Return a new hardlink to a fresh entry, or None on a miss.
+
+        The caller owns (and deletes) the returned file. It is created next to
+        the cache directory, so it shares the entry's filesystem.
+        """
+        path = self.get(key)
+        if not path:
+            return None
+        link_path = os.path.join(os.path.dirname(self.root), f"bol_result_{uuid.uuid4().hex}.csv")
+        try:
+            link_or_copy(path, link_path)
+        except FileNotFoundError:
+            return None  # evicted in the meantime
+        return link_path
+
+    def put_file(self, key: str, src_path: str) -> None:
+        """Store a copy (hardlink when possible) of ``src_path`` under ``key``."""
+        if not self.enabled:
+            return
+        tmp_path = self._tmp_path()
+        try:
+            link_or_copy(src_path, tmp_path)
+            os.replace(tmp_path, self._path(key))
+        finally:
+            safe_unlink(tmp_path)  # only left behind if replace failed
+        self._maybe_prune()
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key``."""
+        if not self.enabled:
+            return
+        tmp_path = self._tmp_path()
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        finally:
+            safe_unlink(tmp_path)  # only left behind if replace failed
+        self._maybe_prune()
+
+    def _tmp_path(self) -> str:
+        # Written next to the final entry so os.replace is atomic
+        os.makedirs(self.root, exist_ok=True)
+        return os.path.join(self.root, f".tmp_{uuid.uuid4().hex}")
+
+    def _maybe_prune(self) -> None:
+        """Remove expired entries and stale temp files, at most once per PRUNE_INTERVAL."""
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL or not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_prune = now
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.csv'):
+                        max_age = self.ttl
+                    elif entry.name.startswith('.tmp_'):
+                        max_age = STALE_TMP_AGE
+                    else:
+                        continue
+                    try:
+                        if now - entry.stat().st_mtime > max_age:
+                            safe_unlink(entry.path)
+                    except FileNotFoundError:
+                        pass  # renamed or removed by another writer meanwhile
+        finally:
+            self._prune_lock.release()
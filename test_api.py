@@ -133,8 +133,11 @@ def test_process_endpoint():
         return False
     finally:
         # Clean up test PDF if we created it
-        if cleanup_pdf and os.path.exists(pdf_path):
-            os.unlink(pdf_path)
+        if cleanup_pdf:
+            try:
+                os.unlink(pdf_path)
+            except FileNotFoundError:
+                pass
 
 def test_docs_endpoint():
     """Test the docs endpoint."""
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for core_processors that run without a server
+"""
+
+import os
+import signal
+import sys
+import tempfile
+
+# Long PDFs only go to the page pool with at least two page processes
+os.environ.setdefault('BOL_PAGE_WORKERS', '2')
+
+import core_processors
+from core_processors import SimpleBOLProcessor, SimplePDFProcessor
+
+def build_test_pdf(path, page_count):
+    """Write a PDF of ``page_count`` pages, each reading ``Page <n>``."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for n in range(1, page_count + 1):
+        stream = f"BT /F1 12 Tf 72 720 Td (Page {n}) Tj ET".encode('ascii')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+                       % (len(objects)))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), page_count)
+
+    body = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(body)
+    body += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    body += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    body += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(bytes(body))
+
+def extract_pages(pdf_path, page_count):
+    """Extract ``pdf_path`` into a new directory; returns True if every page text is right."""
+    with tempfile.TemporaryDirectory() as working_dir:
+        if not SimplePDFProcessor(working_dir).process_pdf(pdf_path):
+            return False
+        for n in range(1, page_count + 1):
+            with open(os.path.join(working_dir, f"{n}.txt"), encoding='utf-8') as f:
+                if f"Page {n}" not in f.read():
+                    print(f"❌ Page {n} text missing")
+                    return False
+    return True
+
+def test_page_pool_survives_killed_worker():
+    """Test that a long PDF is still extracted after a page process was killed."""
+    print("Testing page extraction after killing a page pool process...")
+    if core_processors.pdfium is None or core_processors.PAGE_WORKERS < 2:
+        print("⚠️ Skipped: needs pypdfium2 and BOL_PAGE_WORKERS >= 2")
+        return True
+
+    page_count = core_processors.PARALLEL_MIN_PAGES * 2
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, 'long.pdf')
+        build_test_pdf(pdf_path, page_count)
+
+        # Start the pool, then kill one of its processes
+        if not extract_pages(pdf_path, page_count):
+            print("❌ First extraction failed")
+            return False
+        pool = core_processors._page_pool
+        victim = next(iter(pool._processes))
+        os.kill(victim, signal.SIGKILL)
+
+        if not extract_pages(pdf_path, page_count):
+            print("❌ Extraction after the kill failed")
+            return False
+        if not extract_pages(pdf_path, page_count):
+            print("❌ Second extraction after the kill failed")
+            return False
+
+    print("✅ Page pool recovered from a killed process")
+    return True
+
+def test_result_cache_bounded_by_bytes():
+    """Test that the process_bol LRU stays within its byte budget."""
+    print("Testing the process_bol result cache size bound...")
+    cls = SimpleBOLProcessor
+    original = cls._process_bol
+    budget, item_limit = cls.RESULT_CACHE_MAX_BYTES, cls.RESULT_CACHE_MAX_ITEM_BYTES
+    try:
+        cls.RESULT_CACHE_MAX_BYTES, cls.RESULT_CACHE_MAX_ITEM_BYTES = 1000, 400
+        cls._process_bol = staticmethod(lambda pdf_content, *args: pdf_content * 300)
+        for n in range(10):
+            cls.process_bol(b"%d" % n, "bol.pdf")
+        cls.process_bol(b"big", "bol.pdf")  # 900 bytes, above the item limit
+        
+        sizes = [len(result) for result in cls._result_cache.values()]
+        if sum(sizes) > 1000 or cls._result_cache_bytes != sum(sizes):
+            print(f"❌ Cache holds {sum(sizes)} bytes, counted {cls._result_cache_bytes}")
+            return False
+        if b"9" * 300 not in cls._result_cache.values() or len(sizes) != 3:
+            print(f"❌ Unexpected cache entries: {sizes}")
+            return False
+    finally:
+        cls._process_bol = original
+        cls.RESULT_CACHE_MAX_BYTES, cls.RESULT_CACHE_MAX_ITEM_BYTES = budget, item_limit
+        cls._result_cache.clear()
+        cls._result_cache_bytes = 0
+
+    print("✅ Result cache stays within its byte budget")
+    return True
+
+if __name__ == "__main__":
+    print("Testing core processors...")
+    tests = [test_page_pool_survives_killed_worker, test_result_cache_bounded_by_bytes]
+    failed = [test.__name__ for test in tests if not test()]
+
+    if failed:
+        print(f"\n❌ Failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ All core processor tests passed!")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for file_staging that run without a server
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+from file_staging import stream_multipart_upload, upload_extension
+
+BOUNDARY = "bol-test-boundary"
+
+def build_multipart_body(field, filename, content):
+    """Encode one file part the way browsers and requests do (UTF-8 filename)."""
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode('utf-8') + content + f"\r\n--{BOUNDARY}--\r\n".encode('ascii')
+
+def test_upload_extension():
+    """Test that extensions are taken from the raw client filename."""
+    print("Testing upload_extension...")
+    cases = {
+        '账单.pdf': '.pdf',
+        'Invoice.PDF': '.pdf',
+        'orders.xlsx': '.xlsx',
+        'no_extension': '',
+        'bad.p d f': '',
+        '': '',
+    }
+    ok = True
+    for filename, expected in cases.items():
+        result = upload_extension(filename)
+        if result != expected:
+            print(f"❌ {filename!r}: got {result!r}, expected {expected!r}")
+            ok = False
+    if ok:
+        print("✅ Extensions extracted as expected")
+    return ok
+
+def test_non_ascii_upload_name():
+    """Test that a PDF uploaded under a non-ASCII name is staged as .pdf."""
+    print("Testing upload staging with a non-ASCII filename...")
+    body = build_multipart_body('pdf', '账单.pdf', b'%PDF-1.4 test')
+
+    with tempfile.TemporaryDirectory() as upload_dir:
+        upload = stream_multipart_upload(io.BytesIO(body),
+                                         f"multipart/form-data; boundary={BOUNDARY}",
+                                         upload_dir, ('pdf',))
+        staged = upload.files['pdf']
+        print(f"Uploaded as: {staged.filename}")
+        print(f"Staged as: {os.path.basename(staged.path)}")
+        with open(staged.path, 'rb') as f:
+            content_ok = f.read() == b'%PDF-1.4 test'
+
+    if staged.filename != '账单.pdf' or not staged.path.endswith('.pdf') or not content_ok:
+        print("❌ Upload not staged as a .pdf with its original content")
+        return False
+    print("✅ Non-ASCII upload staged as .pdf")
+    return True
+
+if __name__ == "__main__":
+    print("Testing file staging...")
+    tests = [test_upload_extension, test_non_ascii_upload_name]
+    failed = [test.__name__ for test in tests if not test()]
+
+    if failed:
+        print(f"\n❌ Failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ All file staging tests passed!")
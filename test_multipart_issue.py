@@ -3,16 +3,33 @@
 Test script specifically for multipart form data parsing issue
 """
 
+import io
+import json
+import sys
 import requests
-import tempfile
-import os
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson  # faster JSON encoding/parsing, optional
+except ImportError:
+    orjson = None
+
+def json_loads(data):
+    """Parse a JSON response body (bytes)."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
 
 # Test configuration
 API_BASE_URL = "http://localhost:5000"
+DEBUG_URL = f"{API_BASE_URL}/debug/multipart"
 
-def create_simple_pdf():
-    """Create a minimal PDF for testing."""
-    pdf_content = b"""%PDF-1.4
+# (connect, read) timeouts, so a hung server cannot stall the run; the first
+# upload may have to wait for the server to warm up, so it gets longer
+TIMEOUT = (2.0, 10.0)
+DEBUG_TIMEOUT = (2.0, 30.0)
+
+# Minimal one-page PDF used by every probe; kept in memory, never written to disk
+_PDF_BYTES = b"""%PDF-1.4
 1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj
 2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj
 3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj
@@ -26,176 +43,238 @@ trailer<</Size 4/Root 1 0 R>>
 startxref
 166
 %%EOF"""
-    
-    with tempfile.NamedTemporaryFile(mode='wb', suffix='.pdf', delete=False) as tmp:
-        tmp.write(pdf_content)
-        return tmp.name
+
+# The probes share keep-alive connections instead of reconnecting per request
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# Output is collected and written once at the end instead of one print() per line
+_log = []
+
+def log(message=""):
+    """Queue a line of output."""
+    _log.append(message)
+
+def flush_log():
+    """Write all queued output with a single write call."""
+    if _log:
+        sys.stdout.write("\n".join(_log) + "\n")
+        sys.stdout.flush()
+        _log.clear()
+
+def create_simple_pdf():
+    """Return the minimal test PDF as an in-memory file."""
+    return io.BytesIO(_PDF_BYTES)
 
 def test_debug_endpoint():
     """Test the debug endpoint to diagnose multipart parsing."""
-    print("=" * 60)
-    print("TESTING DEBUG ENDPOINT")
-    print("=" * 60)
-    
-    pdf_path = create_simple_pdf()
+    log("=" * 60)
+    log("TESTING DEBUG ENDPOINT")
+    log("=" * 60)
     
     try:
-        with open(pdf_path, 'rb') as pdf_file:
+        with create_simple_pdf() as pdf_file:
             files = {'pdf': ('test.pdf', pdf_file, 'application/pdf')}
             
-            print(f"Sending request to: {API_BASE_URL}/debug/multipart")
-            print(f"PDF file size: {os.path.getsize(pdf_path)} bytes")
+            log(f"Sending request to: {DEBUG_URL}")
+            log(f"PDF file size: {len(_PDF_BYTES)} bytes")
             
-            response = requests.post(f"{API_BASE_URL}/debug/multipart", files=files)
+            response = SESSION.post(DEBUG_URL, files=files,
+                                    timeout=DEBUG_TIMEOUT)
             
-            print(f"Status Code: {response.status_code}")
-            print(f"Response:")
-            print("-" * 40)
+            log(f"Status Code: {response.status_code}")
+            log(f"Response:")
+            log("-" * 40)
             
             if response.status_code == 200:
-                import json
-                debug_info = response.json()
+                debug_info = json_loads(response.content)
                 
                 # Pretty print the debug info
-                for key, value in debug_info.items():
-                    print(f"{key}: {value}")
+                log(json.dumps(debug_info, indent=2))
                 
                 # Analyze the results
-                print("\n" + "=" * 40)
-                print("ANALYSIS:")
-                print("=" * 40)
+                log("\n" + "=" * 40)
+                log("ANALYSIS:")
+                log("=" * 40)
                 
                 if debug_info.get('files_received'):
-                    print("✅ FILES RECEIVED: Flask is parsing files correctly!")
-                    print(f"   Files: {debug_info['files_received']}")
+                    log("✅ FILES RECEIVED: Flask is parsing files correctly!")
+                    log(f"   Files: {debug_info['files_received']}")
                 else:
-                    print("❌ NO FILES RECEIVED: Flask is not parsing files")
+                    log("❌ NO FILES RECEIVED: Flask is not parsing files")
                     
                 if debug_info.get('has_raw_data'):
-                    print(f"✅ RAW DATA PRESENT: {debug_info['raw_data_length']} bytes")
+                    log(f"✅ RAW DATA PRESENT: {debug_info['raw_data_length']} bytes")
                 else:
-                    print("❌ NO RAW DATA: Request body is empty")
+                    log("❌ NO RAW DATA: Request body is empty")
                 
                 if debug_info.get('parsing_issue'):
-                    print("⚠️  PARSING ISSUE DETECTED")
-                    print("   Suggestions:")
+                    log("⚠️  PARSING ISSUE DETECTED")
+                    log("   Suggestions:")
                     for suggestion in debug_info.get('suggestions', []):
-                        print(f"   - {suggestion}")
+                        log(f"   - {suggestion}")
                 
                 return debug_info.get('files_received', []) != []
             else:
-                print(f"Error: {response.text}")
+                log(f"Error: {response.text}")
                 return False
                 
+    except requests.Timeout:
+        log("Test failed: request timed out")
+        return False
     except Exception as e:
-        print(f"Test failed: {e}")
+        log(f"Test failed: {e}")
         return False
-    finally:
-        if os.path.exists(pdf_path):
-            os.unlink(pdf_path)
 
-def test_different_methods():
+# File part variants: a name, the form field used when they are sent together,
+# and a function building the files value for a fresh PDF file object
+FILE_VARIANTS = [
+    ("Method 1: Standard files parameter", 'pdf_plain',
+     lambda body: body),
+    ("Method 2: With explicit filename", 'pdf_explicit',
+     lambda body: ('test.pdf', body, 'application/pdf')),
+    ("Method 3: With different content-type", 'pdf_octet',
+     lambda body: ('test.pdf', body, 'application/octet-stream')),
+]
+
+# Raw body sent in chunks from the file, no multipart encoding in memory;
+# not a file part, so it always needs a request of its own
+STREAM_SPEC = ("Method 4: Streamed raw body",
+               lambda body: {'data': iter(lambda: body.read(65536), b''),
+                             'headers': {'Content-Type': 'application/pdf'}})
+
+# One request per variant, each as the 'pdf' field, for --legacy runs: a server
+# that mis-parses one part can't then affect the others
+METHOD_SPECS = [
+    (name, lambda body, make=make: {'files': {'pdf': make(body)}})
+    for name, _, make in FILE_VARIANTS
+] + [STREAM_SPEC]
+
+def _probe(spec):
+    """Send one upload variant; returns (success, message)."""
+    try:
+        response = SESSION.post(DEBUG_URL, timeout=TIMEOUT,
+                                **spec(create_simple_pdf()))
+        
+        if response.status_code == 200:
+            debug_info = json_loads(response.content)
+            files_received = debug_info.get('files_received', [])
+            
+            if files_received:
+                return True, f"✅ SUCCESS: {files_received}"
+            # A streamed raw body is not a file part; it must arrive complete
+            if debug_info.get('raw_data_length') == len(_PDF_BYTES):
+                return True, f"✅ SUCCESS: raw body, {debug_info['raw_data_length']} bytes"
+            return False, "❌ FAILED: No files received"
+        return False, f"❌ ERROR: {response.status_code}"
+        
+    except requests.Timeout:
+        return False, "❌ TIMEOUT: no response in time"
+    except Exception as e:
+        return False, f"❌ EXCEPTION: {e}"
+
+def _probe_batch():
+    """Send every file variant in one multipart request; returns (success, message) per variant."""
+    files = {field: make(create_simple_pdf()) for _, field, make in FILE_VARIANTS}
+    try:
+        response = SESSION.post(DEBUG_URL, files=files, timeout=TIMEOUT)
+        
+        if response.status_code != 200:
+            failure = (False, f"❌ ERROR: {response.status_code}")
+            return [failure] * len(FILE_VARIANTS)
+        
+        files_received = json_loads(response.content).get('files_received', [])
+        return [(True, f"✅ SUCCESS: ['{field}']") if field in files_received
+                else (False, f"❌ FAILED: '{field}' not received")
+                for _, field, _ in FILE_VARIANTS]
+        
+    except requests.Timeout:
+        return [(False, "❌ TIMEOUT: no response in time")] * len(FILE_VARIANTS)
+    except Exception as e:
+        return [(False, f"❌ EXCEPTION: {e}")] * len(FILE_VARIANTS)
+
+def test_different_methods(legacy=False):
     """Test different ways to send multipart data."""
-    print("\n" + "=" * 60)
-    print("TESTING DIFFERENT METHODS")
-    print("=" * 60)
+    log("\n" + "=" * 60)
+    log("TESTING DIFFERENT METHODS")
+    log("=" * 60)
     
-    pdf_path = create_simple_pdf()
-    
-    methods = [
-        ("Method 1: Standard files parameter", lambda f: requests.post(
-            f"{API_BASE_URL}/debug/multipart", 
-            files={'pdf': f}
-        )),
-        ("Method 2: With explicit filename", lambda f: requests.post(
-            f"{API_BASE_URL}/debug/multipart", 
-            files={'pdf': ('test.pdf', f, 'application/pdf')}
-        )),
-        ("Method 3: With different content-type", lambda f: requests.post(
-            f"{API_BASE_URL}/debug/multipart", 
-            files={'pdf': ('test.pdf', f, 'application/octet-stream')}
-        ))
-    ]
+    # The probes are independent, so they are sent side by side over the
+    # session's keep-alive pool; output is printed afterwards in method order
+    if legacy:
+        with ThreadPoolExecutor(max_workers=len(METHOD_SPECS)) as executor:
+            outcomes = list(executor.map(_probe, [spec for _, spec in METHOD_SPECS]))
+    else:
+        # The file variants share one request, as separate form fields
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            batch = executor.submit(_probe_batch)
+            stream = executor.submit(_probe, STREAM_SPEC[1])
+            outcomes = batch.result() + [stream.result()]
     
     results = []
     
-    for method_name, method_func in methods:
-        print(f"\n{method_name}:")
-        print("-" * 40)
-        
-        try:
-            with open(pdf_path, 'rb') as pdf_file:
-                response = method_func(pdf_file)
-                
-                if response.status_code == 200:
-                    debug_info = response.json()
-                    files_received = debug_info.get('files_received', [])
-                    
-                    if files_received:
-                        print(f"✅ SUCCESS: {files_received}")
-                        results.append((method_name, True))
-                    else:
-                        print("❌ FAILED: No files received")
-                        results.append((method_name, False))
-                else:
-                    print(f"❌ ERROR: {response.status_code}")
-                    results.append((method_name, False))
-                    
-        except Exception as e:
-            print(f"❌ EXCEPTION: {e}")
-            results.append((method_name, False))
+    for (method_name, _), (success, message) in zip(METHOD_SPECS, outcomes):
+        log(f"\n{method_name}:")
+        log("-" * 40)
+        log(message)
+        results.append((method_name, success))
     
     # Summary
-    print("\n" + "=" * 40)
-    print("SUMMARY:")
-    print("=" * 40)
+    log("\n" + "=" * 40)
+    log("SUMMARY:")
+    log("=" * 40)
     
     for method_name, success in results:
         status = "✅ SUCCESS" if success else "❌ FAILED"
-        print(f"{status}: {method_name}")
-    
-    # Clean up
-    if os.path.exists(pdf_path):
-        os.unlink(pdf_path)
+        log(f"{status}: {method_name}")
     
     return any(success for _, success in results)
 
-def main():
-    """Main test function."""
-    print("MULTIPART FORM DATA DIAGNOSTIC TEST")
-    print("=" * 60)
+def main(legacy=False):
+    """Main test function.
+
+    With ``legacy`` set, each upload variant is sent in a request of its own.
+    """
+    log("MULTIPART FORM DATA DIAGNOSTIC TEST")
+    log("=" * 60)
     
     # Test 1: Debug endpoint
     debug_success = test_debug_endpoint()
     
     # Test 2: Different methods
-    methods_success = test_different_methods()
+    methods_success = test_different_methods(legacy)
     
     # Final analysis
-    print("\n" + "=" * 60)
-    print("FINAL DIAGNOSIS:")
-    print("=" * 60)
+    log("\n" + "=" * 60)
+    log("FINAL DIAGNOSIS:")
+    log("=" * 60)
     
     if debug_success or methods_success:
-        print("✅ GOOD NEWS: At least one method works!")
-        print("   The issue is likely with Thunder Client configuration.")
-        print("   Try recreating your request or using curl/Postman.")
+        log("✅ GOOD NEWS: At least one method works!")
+        log("   The issue is likely with Thunder Client configuration.")
+        log("   Try recreating your request or using curl/Postman.")
     else:
-        print("❌ ISSUE CONFIRMED: Flask is not parsing multipart data.")
-        print("   This could be a server configuration issue.")
-        print("   Check Flask version, dependencies, and server setup.")
+        log("❌ ISSUE CONFIRMED: Flask is not parsing multipart data.")
+        log("   This could be a server configuration issue.")
+        log("   Check Flask version, dependencies, and server setup.")
     
-    print("\n📋 NEXT STEPS:")
+    log("\n📋 NEXT STEPS:")
     if debug_success or methods_success:
-        print("1. Try the debug endpoint in Thunder Client")
-        print("2. Recreate your Thunder Client request from scratch")
-        print("3. Ensure Body type is 'form-data' not 'raw'")
-        print("4. Verify file is actually selected")
+        log("1. Try the debug endpoint in Thunder Client")
+        log("2. Recreate your Thunder Client request from scratch")
+        log("3. Ensure Body type is 'form-data' not 'raw'")
+        log("4. Verify file is actually selected")
     else:
-        print("1. Check server logs for detailed error messages")
-        print("2. Verify Flask and dependencies are installed correctly")
-        print("3. Try restarting the server")
-        print("4. Check if firewall or antivirus is interfering")
+        log("1. Check server logs for detailed error messages")
+        log("2. Verify Flask and dependencies are installed correctly")
+        log("3. Try restarting the server")
+        log("4. Check if firewall or antivirus is interfering")
+    
+    flush_log()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    try:
+        main(legacy='--legacy' in sys.argv[1:])
+    finally:
+        flush_log()  # anything queued before an unexpected error
+        SESSION.close() 
\ No newline at end of file
@@ -109,7 +109,7 @@ class FileUtils:
     @staticmethod
     def get_txt_files(directory):
         """Get all TXT files in the specified directory."""
-        return [f for f in os.listdir(directory) if f.endswith('.txt')]
+        return sorted(f for f in os.listdir(directory) if f.endswith('.txt'))
 
     @staticmethod
     def get_pdf_files(directory):